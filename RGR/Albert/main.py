@@ -1,7 +1,15 @@
 import sys
 import copy
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+import math
+import random
+import time
+from functools import reduce
+from operator import or_
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+except ImportError:  # Классы части 1 (грамматики, разбор, генерация) работают и без tkinter
+    tk = None
 
 # ==========================================
 # ЧАСТЬ 1: ЛОГИКА (КЛАССЫ CFG, CNF, GENERATOR)
@@ -239,51 +247,657 @@ class CNFConverter:
         return cfg
 
 class LanguageGenerator:
-    """Генератор цепочек языка."""
+    """Генератор цепочек языка: обход бора префиксов в глубину с явным
+    стеком, без рекурсии.
+
+    Многосимвольные терминалы разбиваются на символы, и для префикса
+    поддерживаются множества пунктов Эрли (EarleyParser, по одному на
+    позицию, откатываются при возврате). По маскам длин (бит l - из
+    символа или хвоста правила выводима цепочка длины l <= max_len) для
+    каждого множества считается, сколько символов может понадобиться
+    для завершения разбора; в префикс, который не дополняется до
+    цепочки нужной длины, обход не спускается. Поэтому цепочки выдаются
+    лениво, по возрастанию и без повторов, а каждая вершина обхода ведёт
+    хотя бы к одной цепочке - ограничитель шагов не нужен."""
+    def __init__(self, cfg, max_len):
+        self.start = cfg.start_symbol
+        self.rules = {nt: [tuple(c for s in prod if s for c in ((s,) if s in cfg.rules else s))
+                           for prod in prods]
+                      for nt, prods in cfg.rules.items()}
+        self.full = (1 << (max_len + 1)) - 1
+        self.masks = {nt: 0 for nt in self.rules}
+        while True:
+            changed = False
+            for nt, prods in self.rules.items():
+                mask = self.masks[nt]
+                for rhs in prods:
+                    mask |= self._seq_mask(rhs)
+                if mask != self.masks[nt]:
+                    self.masks[nt] = mask
+                    changed = True
+            if not changed: break
+
+        char_cfg = copy.copy(cfg)
+        char_cfg.rules = {nt: [list(rhs) for rhs in prods] for nt, prods in self.rules.items()}
+        self.earley = EarleyParser(char_cfg)
+        # Маски хвостов правил: suffix[r][dot] - для rhs[dot:]
+        self.suffix = [[self._seq_mask(rhs[dot:]) for dot in range(len(rhs) + 1)]
+                       for _, rhs in self.earley.rules]
+
+    def _seq_mask(self, syms):
+        mask = 1
+        for sym in syms:
+            other = self.masks[sym] if sym in self.rules else (1 << len(sym)) & self.full
+            mask = _sum_masks(mask, other, self.full)
+            if not mask: break
+        return mask
+
+    def _follow(self, sets, waiting, follow):
+        """Для последнего множества k: нетерминал X, предсказанный в k, ->
+        маска длин, которыми можно завершить разбор после вывода X."""
+        rules, suffix = self.earley.rules, self.suffix
+        k = len(sets) - 1
+        fixed = {}  # (X, r, dot) -> длины после родителей из прежних множеств
+        local = []  # (X, r, dot, lhs) для родителей из того же множества
+        for X, items in waiting[k].items():
+            if X not in self.rules: continue
+            for r, dot, origin in items:
+                lhs = rules[r][0]
+                if origin < k:
+                    key = (X, r, dot)
+                    fixed[key] = fixed.get(key, 0) | follow[origin].get(lhs, 0)
+                else:
+                    local.append((X, r, dot, lhs))
+        current = {self.start: 1} if k == 0 else {}
+        for (X, r, dot), mask in fixed.items():
+            current[X] = current.get(X, 0) | _sum_masks(suffix[r][dot + 1], mask, self.full)
+        # Родители из того же множества (левая рекурсия, аннулируемые
+        # префиксы) дают систему уравнений - решаем итерацией до неподвижной точки
+        changed = True
+        while changed:
+            changed = False
+            for X, r, dot, lhs in local:
+                mask = current.get(lhs, 0)
+                if not mask: continue
+                mask = current.get(X, 0) | _sum_masks(suffix[r][dot + 1], mask, self.full)
+                if mask != current.get(X, 0):
+                    current[X] = mask
+                    changed = True
+        return current
+
+    def _enter(self, sets, seen, waiting, follow, items):
+        """Добавление множества пунктов; возвращает маску длин, которыми
+        можно дополнить префикс до цепочки языка."""
+        parser = self.earley
+        parser.open_set(sets, seen, waiting, items)
+        parser.close_set(sets, seen, waiting)
+        follow.append(self._follow(sets, waiting, follow))
+        k = len(sets) - 1
+        rest = {}  # (r, dot) -> объединение масок завершения по началам
+        for r, dot, origin in sets[k]:
+            key = (r, dot)
+            rest[key] = rest.get(key, 0) | follow[origin].get(parser.rules[r][0], 0)
+        mask = 0
+        for (r, dot), tail in rest.items():
+            mask |= _sum_masks(self.suffix[r][dot], tail, self.full)
+        return mask
+
+    def words(self, min_len, max_len):
+        """Цепочки языка длины от min_len до max_len: лениво, по
+        возрастанию, без повторов."""
+        window = self.full & ~((1 << min_len) - 1) & ((1 << (max_len + 1)) - 1)
+        sets, seen, waiting, follow = [], [], [], []
+        parser = self.earley
+        mask = self._enter(sets, seen, waiting, follow,
+                           [(r, 0, 0) for r in parser.by_lhs.get(self.start, ())])
+        if not mask & window:
+            return
+        if mask & 1 and min_len == 0:
+            yield ""
+        prefix = []
+        stack = [self._next_chars(waiting)]
+        while stack:
+            ch = next(stack[-1], None)
+            if ch is not None:
+                m = len(prefix) + 1
+                mask = self._enter(sets, seen, waiting, follow, parser.scan(waiting, ch))
+                if (mask << m) & window:
+                    prefix.append(ch)
+                    if mask & 1 and m >= min_len:
+                        yield "".join(prefix)
+                    stack.append(self._next_chars(waiting))
+                    continue
+            else:
+                stack.pop()
+                if prefix: prefix.pop()
+            for lst in (sets, seen, waiting, follow):
+                lst.pop()
+
+    def _next_chars(self, waiting):
+        return iter(sorted(sym for sym in waiting[-1] if sym not in self.rules))
+
     @staticmethod
     def generate(cfg, min_len, max_len):
-        results = set()
-        # Очередь: (текущая форма списка, длина терминалов в ней)
-        queue = [([cfg.start_symbol], 0)]
-        steps = 0
-        MAX_STEPS = 50000 # Защита от зависания
-        
-        while queue and steps < MAX_STEPS:
-            steps += 1
-            curr_form, term_len = queue.pop(0)
-            
-            if term_len > max_len: continue
-            
-            # Ищем первый нетерминал
-            nt_idx = -1
-            for i, sym in enumerate(curr_form):
-                if sym in cfg.rules:
-                    nt_idx = i
-                    break
-            
-            # Если нетерминалов нет - это слово
-            if nt_idx == -1:
-                word = "".join(curr_form)
-                if min_len <= len(word) <= max_len:
-                    results.add(word)
+        return list(LanguageGenerator(cfg, max_len).words(min_len, max_len))
+
+def _sum_masks(a, b, full):
+    """Маска сумм длин: бит i + j для битов i из a и j из b (не выше full)."""
+    if bin(a).count("1") > bin(b).count("1"):
+        a, b = b, a
+    result = 0
+    while a:
+        low = a & -a
+        result |= b << (low.bit_length() - 1)
+        a ^= low
+    return result & full
+
+def _tokens(word):
+    """Цепочка как последовательность терминалов: строка разбивается
+    по символам, если в ней нет пробелов, иначе - по пробелам."""
+    if isinstance(word, str):
+        return word.split() if ' ' in word else list(word)
+    return list(word)
+
+def _bits(mask):
+    """Номера установленных битов маски по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _join_tokens(tokens):
+    """Обратно к _tokens: слитно, если все терминалы односимвольные."""
+    return ("" if all(len(t) == 1 for t in tokens) else " ").join(tokens)
+
+class CYKParser:
+    """Распознаватель Кока-Янгера-Касами для грамматики в НФХ
+    (результат CNFConverter.to_cnf).
+
+    Нетерминалы пронумерованы. Таблица хранится по строкам: ends[A][i] -
+    битовая маска концов j, для которых A выводит tokens[i:j]. Строки
+    заполняются справа налево, и правило A -> B C для новых концов m
+    нетерминала B в строке i даёт сразу все концы A: объединение
+    ends[C][m] (операция над длинными int, без перебора точек разбиения
+    и правил по каждой ячейке). Новые концы A продвигаются дальше по
+    правилам с A слева через очередь, так что работа пропорциональна
+    числу непустых ячеек, умноженному на число правил с данным левым
+    нетерминалом. На леворекурсивной грамматике (A -> A C) концы
+    строки находились бы по одному, поэтому, если леворекурсивных
+    нетерминалов больше, чем праворекурсивных, заполнение идёт по
+    столбцам: это тот же обход для перевёрнутых цепочки и правил."""
+    def __init__(self, cnf):
+        names = sorted(cnf.rules)
+        index = {nt: i for i, nt in enumerate(names)}
+        self.names = names
+        self.accepts_empty = False
+        self.terminal_masks = {}  # терминал -> маска A (A -> a)
+        self.pair_rules = {}      # (B, C) -> маска A (A -> B C)
+        for nt, prods in cnf.rules.items():
+            bit = 1 << index[nt]
+            for prod in prods:
+                if not prod:
+                    if nt != cnf.start_symbol:
+                        raise ValueError(f"Грамматика не в НФХ: {nt} -> ε")
+                    self.accepts_empty = True
+                elif len(prod) == 1 and prod[0] not in index:
+                    self.terminal_masks[prod[0]] = self.terminal_masks.get(prod[0], 0) | bit
+                elif len(prod) == 2 and prod[0] in index and prod[1] in index:
+                    key = (index[prod[0]], index[prod[1]])
+                    self.pair_rules[key] = self.pair_rules.get(key, 0) | bit
+                else:
+                    raise ValueError(f"Грамматика не в НФХ: {nt} -> {' '.join(prod)}")
+        self.by_left = [[] for _ in names]   # B -> [(C, (A, ...))] для A -> B C
+        self.by_right = [[] for _ in names]  # C -> [(B, (A, ...))], для перевёрнутых правил
+        for (b, c), amask in self.pair_rules.items():
+            self.by_left[b].append((c, tuple(_bits(amask))))
+            self.by_right[c].append((b, tuple(_bits(amask))))
+        self.start = index.get(cnf.start_symbol)
+        self.reverse = self._recursive(0) > self._recursive(1)
+
+    def _recursive(self, side):
+        """Число нетерминалов A с A =>+ A ... (side=0) или A =>+ ... A (side=1)."""
+        edges = [set() for _ in self.names]
+        for pair, amask in self.pair_rules.items():
+            for A in _bits(amask):
+                edges[A].add(pair[side])
+        count = 0
+        for A in range(len(self.names)):
+            seen, stack = set(), list(edges[A])
+            while stack:
+                B = stack.pop()
+                if B not in seen:
+                    seen.add(B)
+                    stack.extend(edges[B])
+            count += A in seen
+        return count
+
+    def ends(self, word, by_left=None):
+        """ends[A][i] - маска концов j подцепочек tokens[i:j], выводимых из A
+        (by_left - индекс правил; по умолчанию правила грамматики)."""
+        tokens = _tokens(word)
+        n = len(tokens)
+        ends = [[0] * (n + 1) for _ in self.names]
+        if by_left is None:
+            by_left = self.by_left
+        for i in range(n - 1, -1, -1):
+            pending = {}  # A -> ещё не обработанные концы
+            for A in _bits(self.terminal_masks.get(tokens[i], 0)):
+                pending[A] = 2 << i
+            while pending:
+                B, new = pending.popitem()
+                row = ends[B]
+                new &= ~row[i]
+                if not new:
+                    continue
+                row[i] |= new
+                mids = list(_bits(new))
+                for C, lhs in by_left[B]:
+                    reach = reduce(or_, map(ends[C].__getitem__, mids), 0)
+                    if not reach:
+                        continue
+                    for A in lhs:
+                        fresh = reach & ~ends[A][i]
+                        if fresh:
+                            pending[A] = pending.get(A, 0) | fresh
+        return ends
+
+    def table(self, word):
+        """Таблица разбора: rows[i][j] - маска нетерминалов, выводящих
+        tokens[i:j] (пустые ячейки не хранятся)."""
+        tokens = _tokens(word)
+        n = len(tokens)
+        rows = [{} for _ in range(n + 1)]
+        if self.reverse:
+            # Ячейка (i, j) перевёрнутой цепочки - это (n - j, n - i)
+            for A, row in enumerate(self.ends(tokens[::-1], self.by_right)):
+                bit = 1 << A
+                for i, mask in enumerate(row):
+                    for j in _bits(mask):
+                        rows[n - j][n - i] = rows[n - j].get(n - i, 0) | bit
+            return rows
+        for A, row in enumerate(self.ends(tokens)):
+            bit = 1 << A
+            for i, mask in enumerate(row):
+                for j in _bits(mask):
+                    rows[i][j] = rows[i].get(j, 0) | bit
+        return rows
+
+    def recognize(self, word):
+        """Выводима ли цепочка из стартового символа."""
+        tokens = _tokens(word)
+        if not tokens:
+            return self.accepts_empty
+        if self.start is None:
+            return False
+        if self.reverse:
+            ends = self.ends(tokens[::-1], self.by_right)
+        else:
+            ends = self.ends(tokens)
+        return bool(ends[self.start][0] >> len(tokens) & 1)
+
+class EarleyParser:
+    """Распознаватель Эрли по исходной грамматике (CFG.rules), без
+    приведения к НФХ и связанного с ним роста грамматики.
+
+    Пункт - (номер правила, позиция точки, начало). В каждом множестве
+    пункты проиндексированы символом после точки, поэтому сканирование
+    и завершение берут только подходящие пункты. Пустые правила
+    обрабатываются по Эйкоку-Хорспулу: при предсказании аннулируемого
+    нетерминала точка сразу переносится через него. На LR-подобных
+    грамматиках время линейно, в худшем случае - кубично."""
+    def __init__(self, cfg):
+        self.start = cfg.start_symbol
+        self.rules = []   # номер -> (A, правая часть)
+        self.by_lhs = {}  # A -> номера правил
+        for nt, prods in cfg.rules.items():
+            self.by_lhs.setdefault(nt, [])
+            for prod in prods:
+                self.by_lhs[nt].append(len(self.rules))
+                self.rules.append((nt, tuple(s for s in prod if s)))
+        self.nullable = set()
+        while True:
+            prev_len = len(self.nullable)
+            for nt, rhs in self.rules:
+                if all(s in self.nullable for s in rhs):
+                    self.nullable.add(nt)
+            if len(self.nullable) == prev_len: break
+
+    def chart(self, word):
+        """Множества пунктов для позиций 0..n: (списки пунктов, индексы
+        «символ после точки -> пункты»)."""
+        tokens = _tokens(word)
+        n = len(tokens)
+        sets, seen, waiting = [], [], []
+        self.open_set(sets, seen, waiting, [(r, 0, 0) for r in self.by_lhs.get(self.start, ())])
+        for k in range(n + 1):
+            self.close_set(sets, seen, waiting)
+            if k < n:
+                self.open_set(sets, seen, waiting, self.scan(waiting, tokens[k]))
+        return sets, waiting
+
+    @staticmethod
+    def open_set(sets, seen, waiting, items):
+        """Новое множество пунктов из начальных (предсказанных или
+        сдвинутых сканированием)."""
+        sets.append(list(items))
+        seen.append(set(items))
+        waiting.append({})
+
+    @staticmethod
+    def scan(waiting, token):
+        """Пункты, сдвинутые через token из последнего множества."""
+        return [(r, dot + 1, origin) for r, dot, origin in waiting[-1].get(token, ())]
+
+    def close_set(self, sets, seen, waiting):
+        """Предсказание и завершение в последнем множестве; множества
+        хранятся списками, так что их можно наращивать и откатывать."""
+        rules, by_lhs, nullable = self.rules, self.by_lhs, self.nullable
+        k = len(sets) - 1
+        items, item_set, index = sets[k], seen[k], waiting[k]
+
+        def add(item):
+            if item not in item_set:
+                item_set.add(item)
+                items.append(item)
+
+        predicted = set()
+        completed = set()  # (A, начало): разные правила A продвигают одно и то же
+        pos = 0
+        while pos < len(items):
+            item = items[pos]
+            pos += 1
+            r, dot, origin = item
+            lhs, rhs = rules[r]
+            if dot == len(rhs):
+                # Завершение: продвигаем пункты, ждавшие lhs в начале
+                if origin < k:
+                    if (lhs, origin) in completed: continue
+                    completed.add((lhs, origin))
+                for r2, dot2, origin2 in waiting[origin].get(lhs, ()):
+                    nxt = (r2, dot2 + 1, origin2)
+                    if nxt not in item_set:
+                        item_set.add(nxt)
+                        items.append(nxt)
                 continue
-            
-            # Раскрываем нетерминал
-            nt = curr_form[nt_idx]
-            prefix = curr_form[:nt_idx]
-            suffix = curr_form[nt_idx+1:]
-            
-            for prod in cfg.rules.get(nt, []):
-                new_form = prefix + prod + suffix
-                # Считаем новую длину терминальной части (оптимизация)
-                new_term_len = 0
-                for s in new_form:
-                    if s not in cfg.rules: new_term_len += len(s)
-                
-                if new_term_len <= max_len:
-                    queue.append((new_form, new_term_len))
-                    
-        return sorted(list(results))
+            sym = rhs[dot]
+            index.setdefault(sym, []).append(item)
+            if sym in by_lhs:
+                if sym not in predicted:
+                    predicted.add(sym)
+                    for r2 in by_lhs[sym]:
+                        add((r2, 0, k))
+                if sym in nullable:
+                    add((r, dot + 1, origin))
+
+    def recognize(self, word):
+        """Выводима ли цепочка из стартового символа."""
+        tokens = _tokens(word)
+        sets, _ = self.chart(tokens)
+        rules = self.rules
+        return any(origin == 0 and dot == len(rules[r][1]) and rules[r][0] == self.start
+                   for r, dot, origin in sets[len(tokens)])
+
+    def parse_forest(self, word):
+        """Лес разбора цепочки (ParseForest); root равен None, если
+        цепочка не выводится."""
+        tokens = _tokens(word)
+        sets, _ = self.chart(tokens)
+        return ParseForest(self, tokens, sets)
+
+class ParseForest:
+    """Разделяемый упакованный лес разбора (SPPF) по таблице Эрли.
+
+    Узлы: символьные (A, i, j) - A выводит tokens[i:j] - и промежуточные
+    (номер правила, точка, i, j) - префикс правой части до точки выводит
+    tokens[i:j]. Терминалы - символьные узлы без вариантов. У каждого
+    узла список упакованных вариантов (кортежей детей): у символьного -
+    по одному полному правилу, у промежуточного - префикс на символ
+    короче и узел последнего символа. Узлов O(n^2), вариантов O(n^3),
+    сколько бы ни было деревьев."""
+    def __init__(self, parser, tokens, sets):
+        self.parser = parser
+        self.tokens = tokens
+        n = len(tokens)
+        rules = parser.rules
+        self.seen = [set(items) for items in sets]
+        self.completed = [{} for _ in range(n + 1)]  # j -> (A, i) -> номера правил
+        for j, items in enumerate(sets):
+            for r, dot, origin in items:
+                if dot == len(rules[r][1]):
+                    self.completed[j].setdefault((rules[r][0], origin), []).append(r)
+        self.root = (parser.start, 0, n)
+        self.nodes = {}  # узел -> список вариантов (кортежей детей)
+        if (parser.start, 0) not in self.completed[n]:
+            self.root = None
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node in self.nodes:
+                continue
+            variants = self._variants(node)
+            self.nodes[node] = variants
+            for variant in variants:
+                for child in variant:
+                    if child not in self.nodes:
+                        stack.append(child)
+
+    def _variants(self, node):
+        rules = self.parser.rules
+        if len(node) == 3:
+            A, i, j = node
+            return [((r, len(rules[r][1]), i, j),) for r in self.completed[j].get((A, i), ())]
+        r, dot, i, j = node
+        if dot == 0:
+            return [()]
+        sym = rules[r][1][dot - 1]
+        variants = []
+        if sym not in self.parser.by_lhs:
+            k = j - 1
+            if k >= i and self.tokens[k] == sym and (r, dot - 1, i) in self.seen[k]:
+                variants.append(((r, dot - 1, i, k), (sym, k, j)))
+            return variants
+        for k in range(i, j + 1):
+            if (sym, k) in self.completed[j] and (r, dot - 1, i) in self.seen[k]:
+                variants.append(((r, dot - 1, i, k), (sym, k, j)))
+        return variants
+
+    def count_trees(self):
+        """Число различных деревьев вывода (динамика по лесу без его
+        раскрытия); math.inf, если в лесу есть цикл (A =>+ A)."""
+        if self.root is None:
+            return 0
+        counts = {}
+        on_path = set()
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                on_path.discard(node)
+                total = 0
+                for variant in self.nodes[node]:
+                    product = 1
+                    for child in variant:
+                        product *= counts.get(child, 1)
+                    total += product
+                counts[node] = total
+                continue
+            if node in counts:
+                continue
+            if node in on_path:
+                return math.inf
+            if not self.nodes.get(node):
+                counts[node] = 1  # Терминал
+                continue
+            on_path.add(node)
+            stack.append((node, True))
+            for variant in self.nodes[node]:
+                for child in variant:
+                    if child not in counts:
+                        stack.append((child, False))
+        return counts[self.root]
+
+    def trees(self):
+        """Ленивый перебор деревьев: (A, [дети]), терминал - строка.
+        Варианты, ведущие по циклу, пропускаются, так что при бесконечном
+        числе деревьев перебираются только деревья без повторов узла на пути.
+
+        Дерево задаётся номерами вариантов, выбранных в узлах при обходе
+        в прямом порядке; деревья перебираются в лексикографическом порядке
+        этих номеров (перебор с возвратом), и каждое строится обходом с
+        явным стеком, так что глубина леса не ограничена стеком Python."""
+        if self.root is None:
+            return
+        choices, options = [], []
+        while True:
+            tree, k = self._build(choices, options)
+            if tree is not None:
+                yield tree
+            while k and choices[k - 1] + 1 == len(options[k - 1]):
+                k -= 1
+            if not k:
+                return
+            del choices[k:]
+            del options[k:]
+            choices[k - 1] += 1
+
+    def _build(self, choices, options):
+        """Дерево по номерам вариантов choices (недостающие - нулевые,
+        дописываются в choices); options[k] - допустимые варианты k-го узла
+        выбора. Они зависят только от предыдущих выборов, поэтому уже
+        известные берутся из options, а не пересчитываются. Возвращает
+        (дерево, число выборов) или (None, номер узла без вариантов)."""
+        path = set()  # Узлы на пути от корня
+        built = []
+        stack = [(self.root, None)]
+        k = 0
+        while stack:
+            node, variant = stack.pop()
+            if variant is not None:  # Все дети построены
+                path.discard(node)
+                if len(node) == 3:
+                    tree = (node[0], built.pop())
+                elif not variant:
+                    tree = []
+                else:
+                    tail = built.pop()
+                    tree = built.pop() + [tail]
+                built.append(tree)
+                continue
+            if len(node) == 3 and not self.nodes.get(node):
+                built.append(node[0])  # Терминал
+                continue
+            path.add(node)
+            if k == len(options):
+                options.append([v for v in self.nodes[node] if not any(child in path for child in v)])
+            allowed = options[k]
+            if not allowed:
+                return None, k
+            if k == len(choices):
+                choices.append(0)
+            variant = allowed[choices[k]]
+            k += 1
+            stack.append((node, variant))
+            for child in reversed(variant):
+                stack.append((child, None))
+        return built[0], k
+
+class RandomSampler:
+    """Равномерная случайная выборка цепочек длины n (в терминалах) из
+    грамматики в НФХ (результат CNFConverter.to_cnf).
+
+    counts[A][m] - число деревьев вывода цепочек длины m из A; таблица
+    достраивается по мере надобности (для A -> B C это сумма
+    counts[B][k] * counts[C][m - k]), всего O(n^2 |P|) операций.
+    Спуск сверху вниз с выбором правила и точки разбиения
+    пропорционально этим числам даёт дерево, равномерное среди всех
+    деревьев длины n. В неоднозначной грамматике цепочка с t деревьями
+    выпадала бы в t раз чаще, поэтому она принимается с вероятностью 1/t
+    (t - по лесу разбора Эрли): так выборка sample точно равномерна на
+    L ∩ Σⁿ, но доля принятых попыток - |L ∩ Σⁿ| / counts[S][n], и при
+    сильной неоднозначности она экспоненциально мала. Тогда sample
+    сообщает об ошибке, а derivation остаётся равномерной по выводам."""
+    def __init__(self, cnf):
+        self.start = cnf.start_symbol
+        self.terms = {}  # A -> [a] для правил A -> a
+        self.pairs = {}  # A -> [(B, C)] для правил A -> B C
+        for nt, prods in cnf.rules.items():
+            self.terms[nt] = [prod[0] for prod in prods if len(prod) == 1]
+            self.pairs[nt] = [tuple(prod) for prod in prods if len(prod) == 2]
+        self.counts = {nt: [sum(1 for prod in prods if not prod)] for nt, prods in cnf.rules.items()}
+        self.cnf = cnf
+        self.earley = None  # Нужен только для sample; строится при первом вызове
+
+    def _extend(self, n):
+        for m in range(len(self.counts.get(self.start, [0])), n + 1):
+            for nt, row in self.counts.items():
+                total = len(self.terms[nt]) if m == 1 else 0
+                for B, C in self.pairs[nt]:
+                    for k in range(1, m):
+                        total += self.counts[B][k] * self.counts[C][m - k]
+                row.append(total)
+
+    def count(self, n):
+        """Число деревьев вывода цепочек длины n (не цепочек: с учётом
+        неоднозначности)."""
+        if self.start not in self.counts:
+            return 0
+        self._extend(n)
+        return self.counts[self.start][n]
+
+    def derivation(self, n, rng=random):
+        """Терминалы случайного дерева вывода длины n, равновероятного
+        среди всех таких деревьев; None, если их нет."""
+        if not self.count(n):
+            return None
+        tokens = []
+        stack = [(self.start, n)]
+        while stack:
+            nt, m = stack.pop()
+            if m == 0:
+                continue
+            r = rng.randrange(self.counts[nt][m])
+            if m == 1:
+                tokens.append(self.terms[nt][r])
+                continue
+            for B, C in self.pairs[nt]:
+                for k in range(1, m):
+                    weight = self.counts[B][k] * self.counts[C][m - k]
+                    if r < weight:
+                        stack.append((C, m - k))
+                        stack.append((B, k))  # Левый потомок раскрывается первым
+                        break
+                    r -= weight
+                else:
+                    continue
+                break
+        return tokens
+
+    def sample(self, n, rng=random, attempts=1000, probe=10):
+        """Цепочка длины n (список терминалов), равновероятная среди
+        цепочек языка; None, если их нет.
+
+        ValueError - если по первым probe попыткам ожидаемое число попыток
+        (среднее по ним 1/t, обращённое) больше attempts или все attempts
+        попыток отвергнуты: грамматика слишком неоднозначна для такой длины."""
+        if self.earley is None:
+            self.earley = EarleyParser(self.cnf)
+        accept_rate = 0.0
+        for attempt in range(1, attempts + 1):
+            tokens = self.derivation(n, rng)
+            if tokens is None:
+                return None
+            trees = self.earley.parse_forest(tokens).count_trees()
+            if rng.randrange(trees) == 0:
+                return tokens
+            accept_rate += 1 / trees
+            if attempt == probe and accept_rate * attempts < probe:
+                raise ValueError(f"Равномерная по цепочкам выборка длины {n} недоступна: "
+                                 f"ожидается около {probe / accept_rate:.3g} попыток на цепочку "
+                                 f"(лимит {attempts}); используйте derivation()")
+        raise ValueError(f"Равномерная по цепочкам выборка длины {n} недоступна: "
+                         f"все {attempts} попыток отвергнуты; используйте derivation()")
+
 
 # ==========================================
 # ЧАСТЬ 2: ГРАФИЧЕСКИЙ ИНТЕРФЕЙС (TKINTER)
@@ -352,12 +966,33 @@ class GrammarApp:
         self.ent_max = ttk.Entry(params_frame, width=5)
         self.ent_max.insert(0, "5")
         self.ent_max.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(params_frame, text="Длина выборки:").pack(side=tk.LEFT)
+        self.ent_sample_len = ttk.Entry(params_frame, width=5)
+        self.ent_sample_len.insert(0, "50")
+        self.ent_sample_len.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(params_frame, text="Образцов:").pack(side=tk.LEFT)
+        self.ent_samples = ttk.Entry(params_frame, width=5)
+        self.ent_samples.insert(0, "20")
+        self.ent_samples.pack(side=tk.LEFT, padx=5)
+
+        # Проверка принадлежности одной цепочки
+        word_frame = ttk.Frame(input_frame)
+        word_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(word_frame, text="Цепочка:").pack(side=tk.LEFT)
+        self.ent_word = ttk.Entry(word_frame, width=40)
+        self.ent_word.pack(side=tk.LEFT, padx=5)
+        ttk.Button(word_frame, text="Проверить принадлежность", command=self.check_word_action).pack(side=tk.LEFT, padx=5)
+        self.lbl_word = ttk.Label(word_frame, text="")
+        self.lbl_word.pack(side=tk.LEFT, padx=5)
         
         # Кнопки быстрого доступа
         btn_frame = ttk.Frame(input_frame)
         btn_frame.pack(fill=tk.X, pady=5)
         ttk.Button(btn_frame, text="1. Преобразовать в НФХ", command=self.convert_grammar).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="2. Генерировать цепочки", command=self.generate_and_compare_ui_call).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="3. Случайная проверка (равномерно по выводам)", command=self.sample_check_action).pack(side=tk.LEFT, padx=5)
         
         # Основная рабочая область (Вкладки)
         self.notebook = ttk.Notebook(self.root)
@@ -423,7 +1058,7 @@ class GrammarApp:
                "- Пустая строка: 'eps', 'epsilon', 'ε' или просто пустота.")
         messagebox.showinfo("Справка", msg)
 
-    def convert_grammar(self):
+    def convert_grammar(self, notify=True):
         raw_text = self.txt_grammar.get("1.0", tk.END)
         try:
             self.cfg.parse_from_text(raw_text)
@@ -434,13 +1069,33 @@ class GrammarApp:
             self.txt_cnf.insert(tk.END, str(self.cnf))
             self.txt_cnf.config(state='disabled')
             
-            self.notebook.select(self.tab_cnf)
-            messagebox.showinfo("Успех", "Преобразование в НФХ выполнено!")
+            if notify:
+                self.notebook.select(self.tab_cnf)
+                messagebox.showinfo("Успех", "Преобразование в НФХ выполнено!")
             return True
         except Exception as e:
             messagebox.showerror("Ошибка парсинга/конвертации", str(e))
             return False
 
+    def check_word_action(self):
+        """Проверка принадлежности цепочки: CYK по НФХ и Эрли по исходной грамматике."""
+        if not self.convert_grammar(notify=False):
+            return
+        word = self.ent_word.get().strip()
+        t0 = time.perf_counter()
+        res_cyk = CYKParser(self.cnf).recognize(word)
+        t1 = time.perf_counter()
+        res_earley = EarleyParser(self.cfg).recognize(word)
+        t2 = time.perf_counter()
+        answer = lambda result: "принадлежит" if result else "не принадлежит"
+        status = "" if res_cyk == res_earley else " [РАСХОЖДЕНИЕ]"
+        if res_earley:
+            trees = EarleyParser(self.cfg).parse_forest(word).count_trees()
+            status += f", деревьев вывода: {'бесконечно много' if trees == math.inf else trees}"
+        self.lbl_word.config(text=f"CYK (НФХ): {answer(res_cyk)} ({t1 - t0:.3f} с), "
+                                  f"Эрли (исходная): {answer(res_earley)} ({t2 - t1:.3f} с){status}",
+                             foreground="green" if res_cyk and res_earley else "red")
+
     def generate_and_compare_ui_call(self):
         # Сначала пробуем конвертировать, если еще не сделали
         if not self.convert_grammar(): 
@@ -456,8 +1111,8 @@ class GrammarApp:
 
         # Генерация
         try:
-            set1 = LanguageGenerator.generate(self.cfg, mn, mx)
-            set2 = LanguageGenerator.generate(self.cnf, mn, mx)
+            set1 = LanguageGenerator(self.cfg, mx).words(mn, mx)
+            set2 = LanguageGenerator(self.cnf, mx).words(mn, mx)
             
             # Заполняем поля для редактирования
             self.txt_set1.delete("1.0", tk.END)
@@ -501,6 +1156,55 @@ class GrammarApp:
                 report.append(f"Есть в НФХ, но нет в Исходной ({len(diff2)} шт): {list(diff2)[:10]}...")
             self.txt_diff.insert(tk.END, "\n".join(report))
 
+    def sample_check_action(self):
+        """Проверка на длинных цепочках без перебора: случайные цепочки
+        длины n из НФХ проверяются Эрли по исходной грамматике и CYK по НФХ.
+
+        Цепочки выбираются равномерно среди деревьев вывода НФХ (для
+        однозначной грамматики это равномерно среди цепочек); точная
+        равномерность по цепочкам (RandomSampler.sample) требует подсчёта
+        деревьев для каждой и на неоднозначных грамматиках слишком дорога.
+        Обратное направление проверяется по наличию цепочек длины n."""
+        if not self.convert_grammar(notify=False):
+            return
+        try:
+            n = int(self.ent_sample_len.get())
+            k = int(self.ent_samples.get())
+            if n < 0 or k < 1: raise ValueError("Некорректные параметры.")
+        except ValueError:
+            messagebox.showerror("Ошибка", "Проверьте длину выборки и число образцов.")
+            return
+
+        t0 = time.perf_counter()
+        sampler = RandomSampler(self.cnf)
+        derivations = sampler.count(n)
+        in_cfg = bool((LanguageGenerator(self.cfg, n).masks.get(self.cfg.start_symbol, 0) >> n) & 1)
+        report = [f"Длина {n}: деревьев вывода в НФХ - {derivations}"]
+        failed = []
+        if in_cfg != bool(derivations):
+            failed.append(f"цепочки длины {n} есть только в {'Исходной' if in_cfg else 'НФХ'}")
+        elif derivations:
+            earley, cyk = EarleyParser(self.cfg), CYKParser(self.cnf)
+            for _ in range(k):
+                tokens = sampler.derivation(n)
+                res_earley, res_cyk = earley.recognize(tokens), cyk.recognize(tokens)
+                if not (res_earley and res_cyk):
+                    answer = lambda result: "да" if result else "нет"
+                    failed.append(f"{_join_tokens(tokens)} (Эрли: {answer(res_earley)}, CYK: {answer(res_cyk)})")
+            report.append(f"Проверено образцов: {k} (равномерно по деревьям вывода НФХ, а не по цепочкам)")
+        else:
+            report.append("Цепочек этой длины нет ни в одной из грамматик.")
+        report.append(f"Время: {time.perf_counter() - t0:.3f} с")
+
+        self.txt_diff.delete("1.0", tk.END)
+        if failed:
+            self.lbl_result.config(text="РЕЗУЛЬТАТ: Выборка выявила РАЗЛИЧИЯ", foreground="red")
+            report.append(f"Не прошли проверку ({len(failed)} шт): {failed[:10]}")
+        else:
+            self.lbl_result.config(text="РЕЗУЛЬТАТ: Различий в выборке не найдено", foreground="green")
+        self.txt_diff.insert(tk.END, "\n".join(report))
+        self.notebook.select(self.tab_verify)
+
     def save_to_file(self):
         content = []
         content.append("=== ИСХОДНАЯ ГРАММАТИКА ===")
@@ -524,6 +1228,9 @@ class GrammarApp:
                 messagebox.showerror("Ошибка сохранения", str(e))
 
 if __name__ == "__main__":
+    if tk is None:
+        sys.exit("tkinter не установлен: графический интерфейс недоступен")
+
     root = tk.Tk()
     # Настройка стиля
     style = ttk.Style()
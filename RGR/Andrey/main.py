@@ -1,14 +1,35 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+try:
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+except ImportError:  # Консольные режимы (--search, --batch, --bench) работают без tkinter
+    tk = None
+import json
 import random
+import re
+import sys
+import time
+import mmap
+import argparse
+import itertools
+import threading
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from types import MappingProxyType
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для подсчёта строк (CompiledRegex.count*)
+    np = None
 
 # --- 1. Классы автоматов (Без изменений) ---
 class State:
-    _id_counter = 0
+    _ids = itertools.count()  # Нумерация для состояний вне построения
 
-    def __init__(self, is_final=False):
-        self.id = State._id_counter
-        State._id_counter += 1
+    def __init__(self, is_final=False, ids=None):
+        # ids - счётчик одного построения (см. build_nfa); next() по
+        # itertools.count атомарен, так что потоки не мешают друг другу
+        self.id = next(ids if ids is not None else State._ids)
         self.is_final = is_final
         self.transitions = {}  # char -> list of States
         self.epsilon_transitions = []
@@ -34,9 +55,23 @@ class DFA:
         self.start_state = None
         self.final_states = set()
         self.transitions = {} # (state_id, char) -> next_state_id
+        self.accept_tags = {} # state_id -> frozenset меток (см. nfa_to_dfa(tags=...))
 
 # --- 2. Логика алгоритмов ---
 
+LOG_STEPS = 1   # Уровень лога: этапы построения
+LOG_DETAIL = 2  # Уровень лога: каждый переход и каждая позиция
+
+def log_level(log_func):
+    """Уровень детализации лога - атрибут level у log_func; у функций
+    без него (print) - самый подробный. Сообщения выше уровня не
+    формируются вовсе."""
+    return getattr(log_func, "level", LOG_DETAIL)
+
+def quiet(*args):
+    """Лог, который ничего не выводит."""
+quiet.level = 0
+
 def preprocess_regex(regex):
     """Добавляет явный символ конкатенации '.'"""
     output = []
@@ -59,7 +94,9 @@ def preprocess_regex(regex):
 def regex_to_postfix(regex, log_func=print):
     """Алгоритм сортировочной станции"""
     preprocessed = preprocess_regex(regex)
-    log_func(f"1. Предобработка: {regex} -> {preprocessed}")
+    steps = log_level(log_func) >= LOG_STEPS
+    if steps:
+        log_func(f"1. Предобработка: {regex} -> {preprocessed}")
     
     postfix = ""
     stack = []
@@ -82,16 +119,20 @@ def regex_to_postfix(regex, log_func=print):
     while stack:
         postfix += stack.pop()
     
-    log_func(f"   Постфиксная запись: {postfix}\n")
+    if steps:
+        log_func(f"   Постфиксная запись: {postfix}\n")
     return postfix
 
-def build_nfa(postfix, log_func=print):
+def build_nfa(postfix, log_func=print, ids=None):
+    """ids - счётчик номеров состояний. По умолчанию у каждого построения
+    свой счётчик с нуля, поэтому функция реентерабельна; общий счётчик
+    нужен, только если несколько НКА затем объединяются в один."""
     stack = []
     log_func("2. Построение НКА (Алгоритм Томпсона):")
-    
-    # Сброс счетчика состояний перед построением происходит в GUI классе,
-    # но здесь мы просто строим
-    
+    detail = log_level(log_func) >= LOG_DETAIL
+    if ids is None:
+        ids = itertools.count()
+
     for char in postfix:
         if char == '.':
             nfa2 = stack.pop()
@@ -100,13 +141,14 @@ def build_nfa(postfix, log_func=print):
             nfa1.end.add_epsilon(nfa2.start)
             new_nfa = NFA(nfa1.start, nfa2.end)
             stack.append(new_nfa)
-            log_func(f"   [.] Конкатенация")
+            if detail:
+                log_func(f"   [.] Конкатенация")
             
         elif char == '|':
             nfa2 = stack.pop()
             nfa1 = stack.pop()
-            start = State()
-            end = State(is_final=True)
+            start = State(ids=ids)
+            end = State(is_final=True, ids=ids)
             start.add_epsilon(nfa1.start)
             start.add_epsilon(nfa2.start)
             nfa1.end.is_final = False
@@ -115,12 +157,13 @@ def build_nfa(postfix, log_func=print):
             nfa2.end.add_epsilon(end)
             new_nfa = NFA(start, end)
             stack.append(new_nfa)
-            log_func(f"   [|] Объединение")
+            if detail:
+                log_func(f"   [|] Объединение")
 
         elif char == '*':
             nfa = stack.pop()
-            start = State()
-            end = State(is_final=True)
+            start = State(ids=ids)
+            end = State(is_final=True, ids=ids)
             start.add_epsilon(nfa.start)
             start.add_epsilon(end)
             nfa.end.is_final = False
@@ -128,15 +171,17 @@ def build_nfa(postfix, log_func=print):
             nfa.end.add_epsilon(end)
             new_nfa = NFA(start, end)
             stack.append(new_nfa)
-            log_func(f"   [*] Замыкание Клини")
+            if detail:
+                log_func(f"   [*] Замыкание Клини")
             
         else:
-            start = State()
-            end = State(is_final=True)
+            start = State(ids=ids)
+            end = State(is_final=True, ids=ids)
             start.add_transition(char, end)
             new_nfa = NFA(start, end)
             stack.append(new_nfa)
-            log_func(f"   [sym] Символ '{char}': S{start.id} -> S{end.id}")
+            if detail:
+                log_func(f"   [sym] Символ '{char}': S{start.id} -> S{end.id}")
 
     if not stack:
         raise ValueError("Пустой стек после построения НКА (ошибка выражения)")
@@ -161,9 +206,174 @@ def get_move(states, char):
                 result.add(next_s)
     return result
 
-def nfa_to_dfa(nfa, alphabet, log_func=print):
+class FlatNFA:
+    """Плоское представление НКА Томпсона для больших автоматов.
+
+    Состояния пронумерованы 0..n-1. Эпсилон-замыкания считаются один раз
+    при построении и хранятся кортежами номеров, причём в них остаются
+    только «важные» состояния: с переходом по символу или финальное.
+    by_char[c][i] - замыкание цели перехода из i по символу c, так что шаг
+    моделирования - это объединение готовых кортежей без обхода графа.
+    Неважное состояние с единственным ε-переходом имеет то же замыкание,
+    что и цель этого перехода, поэтому замыкания считаются и хранятся
+    по концу таких цепочек: в (x1|...|xk)* все k целей делят один кортеж."""
+    __slots__ = ('n', 'state_ids', 'final', 'start_set', 'by_char')
+
+    def __init__(self, nfa):
+        index = {}
+        order = []
+        stack = [nfa.start]
+        while stack:
+            st = stack.pop()
+            if st in index:
+                continue
+            index[st] = len(order)
+            order.append(st)
+            stack.extend(st.epsilon_transitions)
+            for targets in st.transitions.values():
+                stack.extend(targets)
+
+        self.n = len(order)
+        self.state_ids = array('i', (st.id for st in order))
+        self.final = frozenset(i for i, st in enumerate(order) if st.is_final)
+        eps = [[index[t] for t in st.epsilon_transitions] for st in order]
+        important = [bool(st.transitions) or st.is_final for st in order]
+
+        closures = {}
+        representative = {}
+
+        def closure(i):
+            # Спуск по цепочке неважных состояний с одним ε-переходом
+            path = []
+            on_path = set()
+            while (i not in representative and not important[i] and len(eps[i]) == 1
+                   and i not in on_path):
+                path.append(i)
+                on_path.add(i)
+                i = eps[i][0]
+            i = representative.get(i, i)
+            for j in path:
+                representative[j] = i
+            cached = closures.get(i)
+            if cached is None:
+                seen = {i}
+                stack = [i]
+                while stack:
+                    for j in eps[stack.pop()]:
+                        if j not in seen:
+                            seen.add(j)
+                            stack.append(j)
+                cached = tuple(sorted(j for j in seen if important[j]))
+                closures[i] = cached
+            return cached
+
+        self.start_set = frozenset(closure(0))
+        self.by_char = {}
+        for i, st in enumerate(order):
+            for char, targets in st.transitions.items():
+                if len(targets) == 1:
+                    step = closure(index[targets[0]])
+                else:
+                    step = tuple(sorted(set().union(*(closure(index[t]) for t in targets))))
+                self.by_char.setdefault(char, {})[i] = step
+
+    def step(self, subset, char):
+        """move + эпсилон-замыкание за одно объединение готовых кортежей."""
+        moves = self.by_char.get(char)
+        result = set()
+        if moves:
+            for i in subset:
+                closure = moves.get(i)
+                if closure:
+                    result.update(closure)
+        return frozenset(result)
+
+    def is_accepting(self, subset):
+        return not self.final.isdisjoint(subset)
+
+    def display_ids(self, subset):
+        return [self.state_ids[i] for i in sorted(subset)]
+
+    def accepts(self, string):
+        by_char = self.by_char
+        current = set(self.start_set)
+        for char in string:
+            moves = by_char.get(char)
+            if not moves:
+                return False
+            nxt = set()
+            for i in current:
+                closure = moves.get(i)
+                if closure:
+                    nxt.update(closure)
+            if not nxt:
+                return False
+            current = nxt
+        return not self.final.isdisjoint(current)
+
+    def __repr__(self):
+        return f"FlatNFA(states={self.n})"
+
+def nfa_step(states, char):
+    return get_epsilon_closure(get_move(states, char))
+
+def has_final(states):
+    return any(s.is_final for s in states)
+
+def subset_ops(nfa):
+    """Операции метода подмножеств для NFA или FlatNFA:
+    (начальное подмножество, шаг с замыканием, финальность, номера для лога)."""
+    if isinstance(nfa, FlatNFA):
+        return nfa.start_set, nfa.step, nfa.is_accepting, nfa.display_ids
+    return get_epsilon_closure({nfa.start}), nfa_step, has_final, lambda subset: [s.id for s in subset]
+
+def nfa_symbols(nfa):
+    """Множество символов, по которым в НКА (NFA или FlatNFA) есть переходы."""
+    if isinstance(nfa, FlatNFA):
+        return frozenset(nfa.by_char)
+    symbols = set()
+    seen, stack = {nfa.start}, [nfa.start]
+    while stack:
+        st = stack.pop()
+        symbols.update(st.transitions)
+        for nxt in st.epsilon_transitions + [t for ts in st.transitions.values() for t in ts]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return frozenset(symbols)
+
+def symbol_classes(nfa, alphabet):
+    """Разбиение алфавита на классы символов, ведущих себя одинаково во всех
+    переходах НКА (NFA или FlatNFA). Классы упорядочены по первому символу."""
+    if isinstance(nfa, FlatNFA):
+        signature = lambda char: frozenset(nfa.by_char.get(char, {}).items())
+    else:
+        columns = {}
+        seen, stack = {nfa.start}, [nfa.start]
+        while stack:
+            st = stack.pop()
+            for char, targets in st.transitions.items():
+                columns.setdefault(char, set()).add((st, tuple(targets)))
+            for nxt in st.epsilon_transitions + [t for ts in st.transitions.values() for t in ts]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        signature = lambda char: frozenset(columns.get(char, ()))
+    groups = {}
+    for char in alphabet:
+        groups.setdefault(signature(char), []).append(char)
+    return sorted(groups.values())
+
+def nfa_to_dfa(nfa, alphabet, log_func=print, max_states=None, cache_size=4096, tags=None):
+    """Метод подмножеств по NFA или FlatNFA. Если задан max_states и ДКА
+    получается больше, построение прерывается и возвращается HybridMatcher.
+    tags - словарь «состояние НКА -> метка»; финальные состояния ДКА
+    получают в dfa.accept_tags множество меток своих состояний НКА.
+    Шаг считается один раз на класс эквивалентных символов."""
     log_func("\n3. Преобразование НКА в ДКА (Метод подмножеств):")
-    start_closure = get_epsilon_closure({nfa.start})
+    start_closure, step, is_accepting, display_ids = subset_ops(nfa)
+    detail = log_level(log_func) >= LOG_DETAIL
+    classes = symbol_classes(nfa, alphabet)
     dfa_states = {start_closure: 0}
     queue = [start_closure]
     
@@ -177,33 +387,686 @@ def nfa_to_dfa(nfa, alphabet, log_func=print):
         processed_count += 1
         
         # Если хотя бы одно состояние НКА в множестве финальное, то и состояние ДКА финальное
-        for s in current_set:
-            if s.is_final:
-                dfa.final_states.add(current_dfa_id)
-                break
-        
-        ids_in_set = [s.id for s in current_set]
-        # log_func(f"   Обработка D{current_dfa_id} {ids_in_set}")
+        if is_accepting(current_set):
+            dfa.final_states.add(current_dfa_id)
+            if tags:
+                dfa.accept_tags[current_dfa_id] = frozenset(tags[s] for s in current_set if s in tags)
 
-        for char in alphabet:
-            move_res = get_move(current_set, char)
-            epsilon_res = get_epsilon_closure(move_res)
+        for cls in classes:
+            epsilon_res = step(current_set, cls[0])
             
             if not epsilon_res:
                 continue
                 
             if epsilon_res not in dfa_states:
+                if max_states is not None and len(dfa_states) >= max_states:
+                    log_func(f"   Превышен бюджет: построено {len(dfa_states)} состояний ДКА, "
+                             f"дальше - моделирование НКА")
+                    return HybridMatcher(dfa, dfa_states, processed_count - 1, cache_size,
+                                         step=step, is_accepting=is_accepting)
                 new_id = len(dfa_states)
                 dfa_states[epsilon_res] = new_id
                 queue.append(epsilon_res)
             
             target_id = dfa_states[epsilon_res]
-            dfa.transitions[(current_dfa_id, char)] = target_id
-            log_func(f"   D{current_dfa_id} --({char})--> D{target_id} (Множество НКА: {[s.id for s in epsilon_res]})")
+            for char in cls:
+                dfa.transitions[(current_dfa_id, char)] = target_id
+            if detail:
+                ids = display_ids(epsilon_res)
+                for char in cls:
+                    log_func(f"   D{current_dfa_id} --({char})--> D{target_id} (Множество НКА: {ids})")
             
     return dfa
 
+class HybridMatcher:
+    """ДКА, построение которого прервано по бюджету состояний.
+
+    Переходы уже обработанных состояний берутся из частичного ДКА,
+    остальные вычисляются моделированием НКА (шаг step, по умолчанию
+    get_move + замыкание).
+    Новые подмножества получают номера и кэшируются, пока кэш не заполнится."""
+    def __init__(self, dfa, dfa_states, processed_count, cache_size=4096,
+                 step=nfa_step, is_accepting=has_final):
+        self.step = step
+        self.is_accepting = is_accepting
+        self.start_state = dfa.start_state
+        self.states_built = len(dfa_states)
+        self.ids = dict(dfa_states)  # frozenset состояний НКА -> номер
+        self.subsets = {i: subset for subset, i in dfa_states.items()}
+        # Переходы неполностью обработанного состояния отбрасываем
+        self.transitions = {k: v for k, v in dfa.transitions.items() if k[0] < processed_count}
+        self.done = set(range(processed_count))
+        self.capacity = max(cache_size, len(self.ids))
+        self.hits = 0
+        self.misses = 0
+
+    def _state_id(self, subset):
+        i = self.ids.get(subset)
+        if i is None and len(self.ids) < self.capacity:
+            i = len(self.ids)
+            self.ids[subset] = i
+            self.subsets[i] = subset
+        return i
+
+    def accepts(self, string):
+        current_id = self.start_state
+        current = self.subsets[current_id]
+        for char in string:
+            if current_id in self.done:
+                # Обработанное состояние: отсутствие перехода означает пустое множество
+                self.hits += 1
+                current_id = self.transitions.get((current_id, char))
+                if current_id is None:
+                    return False
+                current = self.subsets[current_id]
+                continue
+            if current_id is not None and (current_id, char) in self.transitions:
+                self.hits += 1
+                current_id = self.transitions[(current_id, char)]
+                current = self.subsets[current_id]
+                continue
+            self.misses += 1
+            nxt = self.step(current, char)
+            if not nxt:
+                return False
+            nxt_id = self._state_id(nxt)
+            if current_id is not None and nxt_id is not None:
+                self.transitions[(current_id, char)] = nxt_id
+            current, current_id = nxt, nxt_id
+        return self.is_accepting(current)
+
+    def __repr__(self):
+        return (f"HybridMatcher(states_built={self.states_built}, cached={len(self.ids)}, "
+                f"hits={self.hits}, misses={self.misses})")
+
+class LazyDFA:
+    """ДКА, строящийся по ходу моделирования (как в RE2).
+
+    Состояние-подмножество создаётся, только когда входная строка впервые
+    в него приходит. Кэш ограничен max_states: при заполнении он целиком
+    сбрасывается, и построение продолжается с текущего подмножества.
+    При создании считаются только начальное замыкание и алфавит НКА -
+    весь ДКА заранее не строится. Символы вне алфавита сразу ведут в
+    тупик и в кэш переходов не попадают."""
+    DEAD = -1
+
+    def __init__(self, nfa, max_states=1024):
+        self.nfa = nfa
+        self.max_states = max(2, max_states)
+        self.start_closure, self.step, self.is_accepting, _ = subset_ops(nfa)
+        self.alphabet = nfa_symbols(nfa)
+        self.ids = {}          # frozenset состояний НКА -> номер
+        self.subsets = []      # номер -> frozenset
+        self.finals = []       # номер -> финальное ли
+        self.transitions = {}  # (номер, символ) -> номер или DEAD
+        self.flushes = 0
+        self.hits = 0
+        self.misses = 0
+        self.reset()
+
+    def reset(self):
+        """Полная очистка кэша состояний (контейнеры очищаются на месте)."""
+        self.ids.clear()
+        self.subsets.clear()
+        self.finals.clear()
+        self.transitions.clear()
+        self.start_state = self._add(self.start_closure)
+
+    def _add(self, subset):
+        i = len(self.subsets)
+        self.ids[subset] = i
+        self.subsets.append(subset)
+        self.finals.append(self.is_accepting(subset))
+        return i
+
+    def _step(self, state, char):
+        if char not in self.alphabet:
+            return self.DEAD
+        self.misses += 1
+        subset = self.step(self.subsets[state], char)
+        if not subset:
+            self.transitions[(state, char)] = self.DEAD
+            return self.DEAD
+        target = self.ids.get(subset)
+        if target is None:
+            if len(self.subsets) >= self.max_states:
+                self.flushes += 1
+                self.reset()
+                state = self.ids.get(subset)
+                if state is None:
+                    return self._add(subset)
+                return state
+            target = self._add(subset)
+        self.transitions[(state, char)] = target
+        return target
+
+    def accepts(self, string):
+        transitions = self.transitions
+        alphabet = self.alphabet
+        state = self.start_state
+        for char in string:
+            if char not in alphabet:
+                return False
+            nxt = transitions.get((state, char))
+            if nxt is None:
+                nxt = self._step(state, char)
+            else:
+                self.hits += 1
+            if nxt == self.DEAD:
+                return False
+            state = nxt
+        return self.finals[state]
+
+    def __repr__(self):
+        return (f"LazyDFA(states={len(self.subsets)}/{self.max_states}, "
+                f"hits={self.hits}, misses={self.misses}, flushes={self.flushes})")
+
+def _bits(mask):
+    """Номера установленных битов маски по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _positions(postfix, end_marker=None):
+    """Позиции выражения (автомат Глушкова) по постфиксной записи.
+
+    Позиции - листья-символы; для каждого узла считаются nullable, firstpos
+    и lastpos (битовые маски позиций), для позиций - followpos. Если задан
+    end_marker, он приписывается к выражению последней позицией.
+    Возвращает (символы позиций, followpos, (nullable, firstpos, lastpos))."""
+    symbols = []   # позиция -> символ
+    follow = []    # позиция -> маска followpos
+    stack = []     # (nullable, firstpos, lastpos)
+
+    def leaf(char):
+        symbols.append(char)
+        follow.append(0)
+        bit = 1 << (len(symbols) - 1)
+        return (False, bit, bit)
+
+    def concat(a, b):
+        for p in _bits(a[2]):
+            follow[p] |= b[1]
+        first = a[1] | b[1] if a[0] else a[1]
+        last = a[2] | b[2] if b[0] else b[2]
+        return (a[0] and b[0], first, last)
+
+    for char in postfix:
+        if char == '.':
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(concat(a, b))
+        elif char == '|':
+            b = stack.pop()
+            a = stack.pop()
+            stack.append((a[0] or b[0], a[1] | b[1], a[2] | b[2]))
+        elif char == '*':
+            a = stack.pop()
+            for p in _bits(a[2]):
+                follow[p] |= a[1]
+            stack.append((True, a[1], a[2]))
+        else:
+            stack.append(leaf(char))
+    if len(stack) != 1:
+        raise ValueError("Некорректная постфиксная запись")
+    root = stack.pop()
+    if end_marker is not None:
+        root = concat(root, leaf(end_marker))
+    return symbols, follow, root
+
+def regex_to_dfa(postfix, alphabet, log_func=print, max_states=None):
+    """Прямое построение ДКА по синтаксическому дереву (followpos), без НКА.
+
+    К выражению приписывается концевой маркер '#'. Состояние ДКА -
+    множество позиций; оно финальное, если содержит позицию '#'.
+    Если задан max_states и ДКА получается больше, построение
+    прерывается и возвращается None (НКА здесь нет, так что ленивый
+    автомат вызывающий строит сам)."""
+    log_func("\n3. Построение ДКА по followpos (без НКА):")
+    symbols, follow, root = _positions(postfix, '#')
+    end_bit = 1 << (len(symbols) - 1)
+    detail = log_level(log_func) >= LOG_DETAIL
+
+    for p, char in enumerate(symbols[:-1] if detail else ()):
+        log_func(f"   pos {p + 1} '{char}': followpos = {[q + 1 for q in _bits(follow[p])]}")
+
+    by_char = {}
+    for p, char in enumerate(symbols):
+        by_char[char] = by_char.get(char, 0) | (1 << p)
+
+    dfa = DFA()
+    dfa.start_state = 0
+    dfa_states = {root[1]: 0}
+    queue = [root[1]]
+    processed_count = 0
+    while processed_count < len(queue):
+        current = queue[processed_count]
+        current_id = processed_count
+        processed_count += 1
+        if current & end_bit:
+            dfa.final_states.add(current_id)
+        for char in alphabet:
+            target = 0
+            for p in _bits(current & by_char.get(char, 0)):
+                target |= follow[p]
+            if not target:
+                continue
+            if target not in dfa_states:
+                if max_states is not None and len(queue) >= max_states:
+                    log_func(f"   Превышен бюджет в {max_states} состояний ДКА.")
+                    return None
+                dfa_states[target] = len(queue)
+                queue.append(target)
+            target_id = dfa_states[target]
+            dfa.transitions[(current_id, char)] = target_id
+            if detail:
+                log_func(f"   D{current_id} --({char})--> D{target_id} (Позиции: {[q + 1 for q in _bits(target)]})")
+    return dfa
+
+class DerivativeMatcher:
+    """Сопоставление по производным Бржозовского - третий способ наряду
+    с Томпсоном + подмножествами и followpos.
+
+    Термы выражения хранятся с хэш-консингом: одинаковые после
+    нормализации термы имеют один номер (ε и ∅ поглощаются, конкатенация
+    правоассоциативна, объединение - отсортированное множество без ∅ и
+    повторов, r** = r*). Поэтому различных производных конечное число,
+    и производная по символу - это переход ДКА, который строится лениво:
+    кэш derive(терм, символ) ограничен (LRU) и ведёт счётчики hits/misses.
+    Пересечение (and_) и дополнение (not_) поддерживаются термами, хотя
+    синтаксис выражений их пока не задаёт."""
+    EMPTY = 0  # ∅
+    EPS = 1    # ε
+
+    def __init__(self, postfix, cache_size=1 << 16):
+        self.terms = []      # номер -> (вид, аргументы...)
+        self.ids = {}        # (вид, аргументы...) -> номер
+        self.nullable = []   # номер -> принимает ли терм пустую строку
+        self.shown = {}      # номер -> запись терма для лога
+        self.cache = OrderedDict()  # (номер, символ) -> номер производной
+        self.capacity = max(1, cache_size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._intern(('empty',), False)
+        self._intern(('eps',), True)
+        self.start_state = self._parse(postfix)
+
+    @classmethod
+    def from_regex(cls, regex, cache_size=1 << 16):
+        return cls(regex_to_postfix(regex, log_func=quiet), cache_size)
+
+    def _intern(self, key, nullable):
+        i = self.ids.get(key)
+        if i is None:
+            i = len(self.terms)
+            self.ids[key] = i
+            self.terms.append(key)
+            self.nullable.append(nullable)
+        return i
+
+    def _parse(self, postfix):
+        # Элемент стека - очередь множителей конкатенации; терм цепочки
+        # собирается справа налево только когда нужен (|, *, конец), так
+        # что длинный литерал строится за линейное время
+        stack = []
+        for char in postfix:
+            if char == '.':
+                b = stack.pop()
+                a = stack.pop()
+                if len(a) >= len(b):
+                    a.extend(b)
+                    stack.append(a)
+                else:
+                    b.extendleft(reversed(a))
+                    stack.append(b)
+            elif char == '|':
+                b = self._fold(stack.pop())
+                stack.append(deque([self.alt(self._fold(stack.pop()), b)]))
+            elif char == '*':
+                stack.append(deque([self.star(self._fold(stack.pop()))]))
+            else:
+                stack.append(deque([self.char(char)]))
+        if len(stack) != 1:
+            raise ValueError("Некорректная постфиксная запись")
+        return self._fold(stack[0])
+
+    def _fold(self, factors):
+        result = self.EPS
+        for t in reversed(factors):
+            result = self.cat(t, result)
+        return result
+
+    # --- Нормализующие конструкторы ---
+
+    def char(self, c):
+        return self._intern(('chr', c), False)
+
+    def cat(self, a, b):
+        if a == self.EMPTY or b == self.EMPTY:
+            return self.EMPTY
+        if a == self.EPS:
+            return b
+        if b == self.EPS:
+            return a
+        # Правая ассоциативность: множители левой цепочки a навешиваются на b с конца
+        factors = []
+        while self.terms[a][0] == 'cat':
+            factors.append(self.terms[a][1])
+            a = self.terms[a][2]
+        factors.append(a)
+        for x in reversed(factors):
+            b = self._intern(('cat', x, b), self.nullable[x] and self.nullable[b])
+        return b
+
+    def _flatten(self, kind, args):
+        items = set()
+        for t in args:
+            term = self.terms[t]
+            if term[0] == kind:
+                items.update(term[1])
+            else:
+                items.add(t)
+        return items
+
+    def alt(self, *args):
+        items = self._flatten('alt', args)
+        items.discard(self.EMPTY)
+        if not items:
+            return self.EMPTY
+        if len(items) == 1:
+            return items.pop()
+        items = tuple(sorted(items))
+        return self._intern(('alt', items), any(self.nullable[t] for t in items))
+
+    def and_(self, *args):
+        items = self._flatten('and', args)
+        if self.EMPTY in items:
+            return self.EMPTY
+        if len(items) == 1:
+            return items.pop()
+        items = tuple(sorted(items))
+        return self._intern(('and', items), all(self.nullable[t] for t in items))
+
+    def star(self, a):
+        if a == self.EMPTY or a == self.EPS:
+            return self.EPS
+        if self.terms[a][0] == 'star':
+            return a
+        return self._intern(('star', a), True)
+
+    def not_(self, a):
+        term = self.terms[a]
+        if term[0] == 'not':
+            return term[1]
+        return self._intern(('not', a), not self.nullable[a])
+
+    # --- Производные ---
+
+    def derive(self, t, c):
+        """Производная терма t по символу c (с кэшем).
+
+        Подтермы обходятся явным стеком, а не рекурсией: у цепочки
+        аннулируемых множителей (a*a*...a*) производная каждого звена
+        требует производной следующего, и глубина равна длине цепочки.
+        Результаты этого вызова держатся в done, чтобы вытеснение из
+        ограниченного кэша не потеряло их до сборки родителя."""
+        key = (t, c)
+        cache = self.cache
+        d = cache.get(key)
+        if d is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return d
+        done = {}
+        stack = [(t, False)]
+        while stack:
+            u, ready = stack.pop()
+            if ready:
+                d = self._derive(u, c, done)
+                done[u] = d
+                self.misses += 1
+                cache[(u, c)] = d
+                if len(cache) > self.capacity:
+                    cache.popitem(last=False)
+                    self.evictions += 1
+                continue
+            if u in done:
+                continue
+            d = cache.get((u, c))
+            if d is not None:
+                self.hits += 1
+                cache.move_to_end((u, c))
+                done[u] = d
+                continue
+            stack.append((u, True))
+            for x in self._derive_args(u):
+                if x not in done:
+                    stack.append((x, False))
+        return done[t]
+
+    def _derive_args(self, t):
+        """Подтермы, производные которых нужны для производной t."""
+        term = self.terms[t]
+        kind = term[0]
+        if kind == 'cat':
+            return (term[1], term[2]) if self.nullable[term[1]] else (term[1],)
+        if kind in ('alt', 'and'):
+            return term[1]
+        if kind in ('star', 'not'):
+            return (term[1],)
+        return ()
+
+    def _derive(self, t, c, done):
+        """Производная t по уже посчитанным производным подтермов (done)."""
+        term = self.terms[t]
+        kind = term[0]
+        if kind == 'chr':
+            return self.EPS if term[1] == c else self.EMPTY
+        if kind == 'cat':
+            a, b = term[1], term[2]
+            d = self.cat(done[a], b)
+            if self.nullable[a]:
+                d = self.alt(d, done[b])
+            return d
+        if kind == 'alt':
+            return self.alt(*(done[x] for x in term[1]))
+        if kind == 'star':
+            return self.cat(done[term[1]], t)
+        if kind == 'and':
+            return self.and_(*(done[x] for x in term[1]))
+        if kind == 'not':
+            return self.not_(done[term[1]])
+        return self.EMPTY  # ∅ и ε
+
+    def accepts(self, string):
+        state = self.start_state
+        for char in string:
+            state = self.derive(state, char)
+            if state == self.EMPTY:
+                return False
+        return self.nullable[state]
+
+    def to_dfa(self, alphabet, log_func=print, max_states=None):
+        """Явный ДКА: состояния - различные производные, достижимые из старта.
+
+        Если состояний больше max_states, построение прерывается и
+        возвращается сам объект - он продолжит строить ДКА лениво."""
+        log_func("\n3. Построение ДКА по производным Бржозовского:")
+        detail = log_level(log_func) >= LOG_DETAIL
+        dfa = DFA()
+        dfa.start_state = 0
+        ids = {self.start_state: 0}
+        queue = [self.start_state]
+        processed_count = 0
+        while processed_count < len(queue):
+            current = queue[processed_count]
+            current_id = processed_count
+            processed_count += 1
+            if self.nullable[current]:
+                dfa.final_states.add(current_id)
+            for char in alphabet:
+                target = self.derive(current, char)
+                if target == self.EMPTY:
+                    continue
+                target_id = ids.get(target)
+                if target_id is None:
+                    if max_states is not None and len(queue) >= max_states:
+                        log_func(f"   Превышен бюджет в {max_states} состояний - ДКА достраивается лениво.")
+                        return self
+                    target_id = ids[target] = len(queue)
+                    queue.append(target)
+                    dfa.transitions[(current_id, char)] = target_id
+                    if detail:
+                        log_func(f"   D{current_id} --({char})--> D{target_id} (Терм: {self.show(target)})")
+                else:
+                    dfa.transitions[(current_id, char)] = target_id
+                    if detail:
+                        log_func(f"   D{current_id} --({char})--> D{target_id}")
+        return dfa
+
+    def show(self, t):
+        """Запись терма в обычной нотации (для лога, запоминается)."""
+        s = self.shown.get(t)
+        if s is None:
+            s = self.shown[t] = self._show(t)
+        return s
+
+    def _show(self, t):
+        term = self.terms[t]
+        kind = term[0]
+        if kind == 'empty':
+            return '∅'
+        if kind == 'eps':
+            return 'ε'
+        if kind == 'chr':
+            return term[1]
+        if kind == 'cat':
+            parts = []
+            while kind == 'cat':
+                parts.append(term[1])
+                t = term[2]
+                term = self.terms[t]
+                kind = term[0]
+            parts.append(t)
+            return "".join(self._show_operand(p, ('alt', 'and')) for p in parts)
+        if kind == 'alt':
+            return "|".join(self._show_operand(x, ('and',)) for x in term[1])
+        if kind == 'and':
+            return "&".join(self._show_operand(x, ('alt',)) for x in term[1])
+        if kind == 'star':
+            return self._show_operand(term[1], ('cat', 'alt', 'and', 'not')) + '*'
+        return '~' + self._show_operand(term[1], ('cat', 'alt', 'and'))
+
+    def _show_operand(self, t, wrap):
+        s = self.show(t)
+        return f"({s})" if self.terms[t][0] in wrap else s
+
+    def stats(self):
+        return {"terms": len(self.terms), "cached": len(self.cache), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __repr__(self):
+        return (f"DerivativeMatcher(terms={len(self.terms)}, cached={len(self.cache)}/{self.capacity}, "
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})")
+
+class BitParallelNFA:
+    """Битово-параллельное моделирование автомата Глушкова (Shift-And).
+
+    Множество активных позиций хранится в int: бит 0 - начальное
+    состояние, бит p + 1 - позиция p (см. _positions). Позиции идут в
+    порядке записи, поэтому переходы конкатенации - почти всегда p -> p + 1
+    и выполняются одним сдвигом: (D << 1) & shift. Остальные переходы
+    (звёздочка, объединение) берутся из таблиц по байтам D: tables[k][b] -
+    объединение followpos позиций 8k..8k+7, заданных байтом b. Шаг:
+    D = (сдвиг | таблицы) & masks[символ].
+    При числе позиций не больше WORD (машинное слово) используются таблицы;
+    для больших выражений таблицы слишком велики, и остальные переходы
+    собираются по установленным битам (длинная арифметика int)."""
+    WORD = 64
+
+    def __init__(self, postfix):
+        symbols, follow, (nullable, first, last) = _positions(postfix)
+        self.size = len(symbols) + 1
+        follow = [first << 1] + [f << 1 for f in follow]
+        self.masks = {}
+        for p, char in enumerate(symbols):
+            self.masks[char] = self.masks.get(char, 0) | (2 << p)
+        self.final = (last << 1) | (1 if nullable else 0)
+
+        self.shift = 0
+        self.extra = {}  # бит-источник -> переходы, не покрытые сдвигом
+        for i, f in enumerate(follow):
+            nxt = 1 << (i + 1)
+            if f & nxt:
+                self.shift |= nxt
+                f ^= nxt
+            if f:
+                self.extra[i] = f
+        self.extra_mask = sum(1 << i for i in self.extra)
+
+        self.word_sized = self.size - 1 <= self.WORD
+        self.tables = []
+        if self.word_sized:
+            for base in range(0, self.size, 8):
+                table = [0] * 256
+                for b in range(1, 256):
+                    low = b & -b
+                    table[b] = table[b ^ low] | self.extra.get(base + low.bit_length() - 1, 0)
+                self.tables.append(table)
+
+    @classmethod
+    def from_regex(cls, regex):
+        return cls(regex_to_postfix(regex, log_func=quiet))
+
+    def accepts(self, string):
+        masks = self.masks
+        shift = self.shift
+        extra_mask = self.extra_mask
+        state = 1
+        if self.word_sized:
+            tables = self.tables
+            for char in string:
+                nxt = (state << 1) & shift
+                rest = state & extra_mask
+                k = 0
+                while rest:
+                    nxt |= tables[k][rest & 255]
+                    rest >>= 8
+                    k += 1
+                state = nxt & masks.get(char, 0)
+                if not state:
+                    return False
+        else:
+            extra = self.extra
+            for char in string:
+                nxt = (state << 1) & shift
+                rest = state & extra_mask
+                while rest:
+                    low = rest & -rest
+                    nxt |= extra[low.bit_length() - 1]
+                    rest ^= low
+                state = nxt & masks.get(char, 0)
+                if not state:
+                    return False
+        return bool(state & self.final)
+
+    def __repr__(self):
+        mode = "слово" if self.word_sized else "длинное int"
+        return f"BitParallelNFA(positions={self.size - 1}, {mode})"
+
+def nfa_matcher(postfix):
+    """Автомат для моделирования НКА при проверке строк - BitParallelNFA.
+    Выше BitParallelNFA.WORD позиций он работает на длинной арифметике int,
+    но и там не медленнее FlatNFA по автомату Томпсона: позиций Глушкова
+    втрое меньше, чем состояний Томпсона, а шаг - несколько операций
+    над int вместо обхода списков."""
+    return BitParallelNFA(postfix)
+
 def simulate_nfa(nfa, string):
+    if isinstance(nfa, (FlatNFA, BitParallelNFA)):
+        return nfa.accepts(string)
     current_states = get_epsilon_closure({nfa.start})
     for char in string:
         move_result = get_move(current_states, char)
@@ -214,6 +1077,8 @@ def simulate_nfa(nfa, string):
     return False
 
 def simulate_dfa(dfa, string):
+    if isinstance(dfa, (HybridMatcher, LazyDFA, DerivativeMatcher, CompiledRegex)):
+        return dfa.accepts(string)
     current = dfa.start_state
     for char in string:
         if (current, char) in dfa.transitions:
@@ -222,15 +1087,996 @@ def simulate_dfa(dfa, string):
             return False
     return current in dfa.final_states
 
+def dfa_ops(dfa):
+    """Операции обхода любого из построенных ДКА:
+    (начальное состояние, шаг, финальность, символы переходов).
+    Шаг возвращает None, если перехода нет. У HybridMatcher и LazyDFA
+    состояние - подмножество НКА (номера у LazyDFA меняются при сбросе),
+    а шаг идёт через их таблицы переходов, где они уже построены."""
+    if isinstance(dfa, CompiledRegex):
+        rows = dfa.rows
+        return dfa.start, lambda q, c: rows[q].get(c), dfa.finals.__contains__, set(dfa.alphabet)
+    if isinstance(dfa, DerivativeMatcher):
+        def step(t, c):
+            d = dfa.derive(t, c)
+            return None if d == dfa.EMPTY else d
+        symbols = {term[1] for term in dfa.terms if term[0] == 'chr'}
+        return dfa.start_state, step, dfa.nullable.__getitem__, symbols
+    if isinstance(dfa, LazyDFA):
+        def step(subset, c):
+            i = dfa.ids.get(subset)
+            if i is None:
+                return dfa.step(subset, c) or None
+            t = dfa.transitions.get((i, c))
+            if t is None:
+                t = dfa._step(i, c)
+            return None if t == dfa.DEAD else dfa.subsets[t]
+        return dfa.subsets[dfa.start_state], step, dfa.is_accepting, set(dfa.alphabet)
+    if isinstance(dfa, HybridMatcher):
+        def step(subset, c):
+            i = dfa.ids.get(subset)
+            if i in dfa.done:
+                t = dfa.transitions.get((i, c))
+                return None if t is None else dfa.subsets[t]
+            return dfa.step(subset, c) or None
+        return dfa.subsets[dfa.start_state], step, dfa.is_accepting, set()
+    transitions = dfa.transitions
+    return (dfa.start_state, lambda q, c: transitions.get((q, c)),
+            dfa.final_states.__contains__, {c for _, c in transitions})
+
+def find_counterexample(nfa, dfa, alphabet=None):
+    """Точная проверка эквивалентности НКА и ДКА.
+
+    Обход в ширину по произведению «подмножество НКА x состояние ДКА»,
+    пары строятся по ходу обхода. Возвращает кратчайшую строку, которую
+    автоматы оценивают по-разному, или None, если они эквивалентны.
+    По умолчанию алфавит - все символы переходов обоих автоматов."""
+    if not isinstance(nfa, FlatNFA):
+        nfa = FlatNFA(nfa)
+    dfa_start, dfa_step, dfa_final, dfa_symbols = dfa_ops(dfa)
+    if alphabet is None:
+        alphabet = sorted(set(nfa.by_char) | dfa_symbols)
+    start = (nfa.start_set, dfa_start)
+    parent = {start: None}  # пара -> (предыдущая пара, символ)
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        subset, state = pair
+        if nfa.is_accepting(subset) != (state is not None and dfa_final(state)):
+            chars = []
+            while parent[pair] is not None:
+                pair, char = parent[pair]
+                chars.append(char)
+            return "".join(reversed(chars))
+        for char in alphabet:
+            nxt = (nfa.step(subset, char), None if state is None else dfa_step(state, char))
+            if not nxt[0] and nxt[1] is None:
+                continue  # Оба автомата отвергают любое продолжение
+            if nxt not in parent:
+                parent[nxt] = (pair, char)
+                queue.append(nxt)
+    return None
+
+# --- Компиляция выражений с кэшем ---
+
+class CompiledRegex:
+    """Скомпилированное выражение: неизменяемый ДКА, построенный по
+    followpos (без объектов State), может храниться, переиспользоваться
+    и передаваться между процессами.
+
+    rows[i] - переходы состояния i (символ -> номер), отсутствующий
+    переход означает отказ. Строки - MappingProxyType: объект делится
+    через кэш между всеми вызывающими, и изменить его нельзя."""
+    __slots__ = ('pattern', 'postfix', 'alphabet', 'start', 'finals', 'rows')
+
+    def __init__(self, pattern, postfix):
+        alphabet = tuple(sorted(set(c for c in postfix if c.isalnum())))
+        dfa = regex_to_dfa(postfix, alphabet, log_func=quiet)
+        rows = [{} for _ in range(len({dfa.start_state} | set(dfa.transitions.values())))]
+        for (state, char), target in dfa.transitions.items():
+            rows[state][char] = target
+        setattr_ = object.__setattr__
+        setattr_(self, 'pattern', pattern)
+        setattr_(self, 'postfix', postfix)
+        setattr_(self, 'alphabet', alphabet)
+        setattr_(self, 'start', dfa.start_state)
+        setattr_(self, 'finals', frozenset(dfa.final_states))
+        setattr_(self, 'rows', tuple(MappingProxyType(row) for row in rows))
+
+    @classmethod
+    def _from_parts(cls, pattern, postfix, alphabet, start, finals, rows):
+        obj = cls.__new__(cls)
+        setattr_ = object.__setattr__
+        rows = tuple(MappingProxyType(dict(row)) for row in rows)
+        for name, value in zip(cls.__slots__, (pattern, postfix, alphabet, start, finals, rows)):
+            setattr_(obj, name, value)
+        return obj
+
+    def __reduce__(self):
+        # MappingProxyType не сериализуется: строки передаются словарями
+        parts = tuple(getattr(self, name) for name in self.__slots__)
+        return (CompiledRegex._from_parts, parts[:-1] + (tuple(dict(row) for row in self.rows),))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledRegex неизменяем")
+
+    def accepts(self, string):
+        rows = self.rows
+        state = self.start
+        for char in string:
+            state = rows[state].get(char)
+            if state is None:
+                return False
+        return state in self.finals
+
+    def __repr__(self):
+        return f"CompiledRegex({self.pattern!r}, states={len(self.rows)})"
+
+    # --- Подсчёт и случайная выборка принимаемых строк ---
+
+    def _edges(self):
+        """Рёбра графа переходов: (источник, цель, число символов)."""
+        edges = {}
+        for q, row in enumerate(self.rows):
+            for t in row.values():
+                edges[(q, t)] = edges.get((q, t), 0) + 1
+        return [(q, t, k) for (q, t), k in edges.items()]
+
+    def _dtype(self, modulus, factor):
+        # int64 хватает, если сумма n произведений остатка на множитель
+        # не больше factor не переполняется
+        n = max(1, len(self.rows))
+        if modulus is not None and (modulus - 1) * factor * n < 2 ** 63:
+            return np.int64
+        return object
+
+    def _dp(self, steps, vector, forward, modulus):
+        """Векторы динамики для длин 0..steps (генератор): вперёд - число
+        строк, ведущих из старта в каждое состояние; назад - число
+        принимаемых строк, начинающихся в каждом состоянии."""
+        edges = self._edges()
+        if forward:
+            edges = [(t, q, k) for q, t, k in edges]
+        # Дальше всегда: new[q] = сумма vector[t] * k по рёбрам (q, t, k)
+        if np is None:
+            yield vector
+            for _ in range(steps):
+                new = [0] * len(vector)
+                for q, t, k in edges:
+                    new[q] += vector[t] * k
+                if modulus is not None:
+                    new = [x % modulus for x in new]
+                vector = new
+                yield vector
+            return
+        dtype = self._dtype(modulus, max(1, len(self.alphabet)))
+        edges.sort()
+        dst = np.array([q for q, _, _ in edges], dtype=np.int64)
+        src = np.array([t for _, t, _ in edges], dtype=np.int64)
+        mult = np.array([k for _, _, k in edges], dtype=np.int64).astype(dtype)
+        # Рёбра отсортированы по q: сумма по группам - одно reduceat
+        targets, starts = np.unique(dst, return_index=True)
+        vector = np.array(vector, dtype=dtype)
+        yield vector
+        for _ in range(steps):
+            new = np.zeros(len(self.rows), dtype=dtype)
+            if len(edges):
+                new[targets] = np.add.reduceat(vector[src] * mult, starts)
+            if modulus is not None:
+                new %= modulus
+            vector = new
+            yield vector
+
+    def count_by_length(self, max_length, modulus=None):
+        """Число принимаемых строк каждой длины 0..max_length.
+
+        Динамика по длине вдоль рёбер графа переходов (на NumPy, если он
+        есть): O(max_length * рёбер). Без modulus счёт точный (int Python,
+        dtype=object), с modulus - по модулю (int64, если он помещается)."""
+        start = [0] * len(self.rows)
+        start[self.start] = 1
+        finals = sorted(self.finals)
+        if np is not None:
+            finals = np.array(finals, dtype=np.int64)
+        counts = []
+        for vector in self._dp(max_length, start, True, modulus):
+            if np is None:
+                total = sum(vector[q] for q in finals)
+            else:
+                total = int(vector[finals].sum())
+            counts.append(total % modulus if modulus is not None else total)
+        return counts
+
+    def count(self, length, modulus=None):
+        """Число принимаемых строк длины length для больших length:
+        быстрое возведение матрицы переходов в степень, O(n^3 log length).
+        Если динамика по длине дешевле (большой ДКА), считается ею."""
+        n = len(self.rows)
+        if length * max(1, len(self._edges())) <= n ** 3 * max(1, length.bit_length()):
+            return self.count_by_length(length, modulus)[-1]
+        if np is None:
+            matrix = [[0] * n for _ in range(n)]
+            for q, t, k in self._edges():
+                matrix[q][t] = k
+
+            def mul(a, b):
+                cols = list(zip(*b))
+                res = [[sum(x * y for x, y in zip(row, col)) for col in cols] for row in a]
+                return res if modulus is None else [[x % modulus for x in row] for row in res]
+
+            vector = [[1 if q == self.start else 0 for q in range(n)]]
+        else:
+            dtype = self._dtype(modulus, modulus or 1)
+            matrix = np.zeros((n, n), dtype=dtype)
+            for q, t, k in self._edges():
+                matrix[q, t] = k if modulus is None else k % modulus
+            vector = np.zeros((1, n), dtype=dtype)
+            vector[0, self.start] = 1
+
+            def mul(a, b):
+                res = a.dot(b)
+                return res if modulus is None else res % modulus
+
+        while length:
+            if length & 1:
+                vector = mul(vector, matrix)
+            length >>= 1
+            if length:
+                matrix = mul(matrix, matrix)
+        total = sum(int(vector[0][q]) for q in self.finals)
+        return total % modulus if modulus is not None else total
+
+    def sample(self, length, k=1, rnd=random):
+        """k принимаемых строк длины length, каждая выбрана равновероятно
+        среди всех таких строк (пустой список, если их нет).
+
+        suffix[m][q] - число принимаемых строк длины m из состояния q;
+        очередной символ выбирается с вероятностью, пропорциональной
+        suffix следующего состояния."""
+        finals = [1 if q in self.finals else 0 for q in range(len(self.rows))]
+        suffix = list(self._dp(length, finals, False, None))
+        if not suffix[length][self.start]:
+            return []
+        rows = [sorted(row.items()) for row in self.rows]
+        result = []
+        for _ in range(k):
+            q = self.start
+            chars = []
+            for m in range(length, 0, -1):
+                pick = rnd.randrange(int(suffix[m][q]))
+                for char, t in rows[q]:
+                    weight = int(suffix[m - 1][t])
+                    if pick < weight:
+                        chars.append(char)
+                        q = t
+                        break
+                    pick -= weight
+            result.append("".join(chars))
+        return result
+
+class RegexCache:
+    """LRU-кэш скомпилированных выражений ограниченного размера.
+
+    Ключ - постфиксная запись: выражения, отличающиеся только лишними
+    скобками, делят одну запись. Кэш можно использовать из нескольких
+    потоков; компиляция идёт вне блокировки."""
+    def __init__(self, maxsize=256):
+        self.maxsize = max(1, maxsize)
+        self.entries = OrderedDict()  # постфиксная запись -> CompiledRegex
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        with self.lock:
+            compiled = self.entries.get(key)
+            if compiled is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return compiled
+
+    def put(self, key, compiled):
+        """Сохранить результат; если другой поток успел раньше - вернуть его."""
+        with self.lock:
+            existing = self.entries.get(key)
+            if existing is not None:
+                return existing
+            self.entries[key] = compiled
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return compiled
+
+    def get(self, regex):
+        key = _pattern_key(regex)
+        compiled = self.lookup(key)
+        if compiled is None:
+            compiled = self.put(key, CompiledRegex(regex, key))
+        return compiled
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {"size": len(self.entries), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __repr__(self):
+        return (f"RegexCache(size={len(self.entries)}/{self.maxsize}, "
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})")
+
+REGEX_CACHE = RegexCache()
+
+def _pattern_key(regex):
+    return regex_to_postfix(regex.strip(), log_func=quiet)
+
+def _compile_uncached(regex):
+    return CompiledRegex(regex, _pattern_key(regex))
+
+def compile(regex, cache=REGEX_CACHE):
+    """Скомпилировать выражение (повторные вызовы берут ДКА из кэша)."""
+    return cache.get(regex)
+
+def compile_many(regexes, workers=None, processes=False, cache=REGEX_CACHE):
+    """Пакетная компиляция в пуле потоков (processes=True - процессов).
+
+    Результаты возвращаются в порядке regexes. Уже скомпилированные
+    выражения берутся из кэша, одинаковые компилируются один раз."""
+    regexes = list(regexes)
+    keys = [_pattern_key(regex) for regex in regexes]
+    found = {}
+    todo = {}  # ключ -> выражение, которого нет в кэше
+    for regex, key in zip(regexes, keys):
+        if key in found or key in todo:
+            continue
+        compiled = cache.lookup(key)
+        if compiled is None:
+            todo[key] = regex
+        else:
+            found[key] = compiled
+    if todo:
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_class(max_workers=workers) as pool:
+            for key, compiled in zip(todo, pool.map(_compile_uncached, todo.values())):
+                found[key] = cache.put(key, compiled)
+    return [found[key] for key in keys]
+
+# --- Набор выражений в одном автомате ---
+
+class MultiPatternDFA:
+    """Один ДКА для списка выражений (основа генератора лексеров).
+
+    НКА Томпсона всех выражений объединяются общим стартом с
+    ε-переходами; финальное состояние i-го НКА помечается номером i.
+    После детерминизации каждое финальное состояние ДКА знает множество
+    номеров выражений, которые в нём принимают; меньший номер - выше
+    приоритет. Один проход по строке отвечает сразу за все выражения."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        ids = itertools.count()  # Общая нумерация: номера концов должны различаться
+        start = State(ids=ids)
+        end_tags = {}
+        for i, regex in enumerate(self.patterns):
+            nfa = build_nfa(regex_to_postfix(regex, log_func=quiet), log_func=quiet, ids=ids)
+            start.add_epsilon(nfa.start)
+            end_tags[nfa.end.id] = i
+        self.nfa = NFA(start, None)
+        flat = FlatNFA(self.nfa)
+        tags = {i: end_tags[sid] for i, sid in enumerate(flat.state_ids) if sid in end_tags}
+        self.alphabet = sorted(set(c for regex in self.patterns for c in regex if c.isalnum()))
+        self.dfa = nfa_to_dfa(flat, self.alphabet, log_func=quiet, tags=tags)
+        self.priority = {sid: min(ids) for sid, ids in self.dfa.accept_tags.items()}
+
+    def match(self, string):
+        """Номера всех выражений, которым строка соответствует целиком."""
+        transitions = self.dfa.transitions
+        current = self.dfa.start_state
+        for char in string:
+            current = transitions.get((current, char))
+            if current is None:
+                return frozenset()
+        return self.dfa.accept_tags.get(current, frozenset())
+
+    def tokenize(self, string):
+        """Разбиение на лексемы: самое длинное совпадение, при равной длине -
+        выражение с меньшим номером. Возвращает список (номер, лексема)."""
+        transitions = self.dfa.transitions
+        priority = self.priority
+        tokens = []
+        pos = 0
+        while pos < len(string):
+            current = self.dfa.start_state
+            last_end, last_id = -1, None
+            i = pos
+            while i < len(string):
+                current = transitions.get((current, string[i]))
+                if current is None:
+                    break
+                i += 1
+                if current in priority:
+                    last_end, last_id = i, priority[current]
+            if last_id is None:
+                raise ValueError(f"Нет подходящего выражения в позиции {pos}: '{string[pos:pos + 10]}'")
+            tokens.append((last_id, string[pos:last_end]))
+            pos = last_end
+        return tokens
+
+# --- Поиск вхождений в больших данных ---
+
+class LiteralInfo:
+    """Литеральные сведения о подвыражении (для префильтра поиска).
+
+    exact    - множество всех строк подвыражения или None, если их много/бесконечно;
+    prefixes - каждое совпадение начинается с одной из этих строк;
+    suffixes - каждое совпадение заканчивается одной из этих строк;
+    required - каждое совпадение содержит хотя бы одну из этих строк.
+    Пустая строка в множестве означает «сведений нет»."""
+    MAX_SET = 16
+
+    def __init__(self, exact, prefixes, suffixes, required):
+        self.exact = exact
+        self.prefixes = prefixes
+        self.suffixes = suffixes
+        self.required = required
+
+    def __repr__(self):
+        return (f"LiteralInfo(exact={self.exact}, prefixes={set(self.prefixes)}, "
+                f"suffixes={set(self.suffixes)}, required={set(self.required)})")
+
+def _trim_literals(strings, keep_tail=False):
+    """Ужимает множество до MAX_SET, укорачивая самые длинные строки.
+    Укороченные префиксы/суффиксы/подстроки остаются корректными сведениями."""
+    strings = frozenset(strings)
+    while len(strings) > LiteralInfo.MAX_SET:
+        limit = max(len(x) for x in strings) - 1
+        if keep_tail:
+            strings = frozenset(x[len(x) - limit:] if len(x) > limit else x for x in strings)
+        else:
+            strings = frozenset(x[:limit] for x in strings)
+    return strings
+
+def _absorb_required(strings):
+    """Строка, содержащая другую альтернативу, ничего не добавляет: выбрасываем её."""
+    return frozenset(x for x in strings
+                     if not any(y != x and y in x for y in strings))
+
+def _literal_score(strings):
+    # Чем длиннее самая короткая альтернатива и чем их меньше, тем лучше
+    return (min(len(x) for x in strings), -len(strings))
+
+def _cross(left, right):
+    if len(left) * len(right) > LiteralInfo.MAX_SET:
+        return None
+    return frozenset(x + y for x in left for y in right)
+
+def extract_literals(postfix):
+    """Литеральные сведения для постфиксной записи из regex_to_postfix."""
+    stack = []
+    nothing = frozenset([""])
+    for char in postfix:
+        if char == '.':
+            b = stack.pop()
+            a = stack.pop()
+            exact = _cross(a.exact, b.exact) if a.exact is not None and b.exact is not None else None
+            prefixes = (_cross(a.exact, b.prefixes) if a.exact is not None else None) or a.prefixes
+            suffixes = (_cross(a.suffixes, b.exact) if b.exact is not None else None) or b.suffixes
+            candidates = [a.required, b.required]
+            joined = _cross(a.suffixes, b.prefixes)
+            if joined is not None:
+                candidates.append(joined)
+            if exact is not None:
+                candidates.append(exact)
+            required = max((_absorb_required(c) for c in candidates), key=_literal_score)
+            stack.append(LiteralInfo(exact, prefixes, suffixes, required))
+        elif char == '|':
+            b = stack.pop()
+            a = stack.pop()
+            exact = None
+            if a.exact is not None and b.exact is not None and len(a.exact | b.exact) <= LiteralInfo.MAX_SET:
+                exact = a.exact | b.exact
+            stack.append(LiteralInfo(exact,
+                                     _trim_literals(a.prefixes | b.prefixes),
+                                     _trim_literals(a.suffixes | b.suffixes, keep_tail=True),
+                                     _trim_literals(_absorb_required(a.required | b.required))))
+        elif char == '*':
+            stack.pop()
+            stack.append(LiteralInfo(None, nothing, nothing, nothing))
+        else:
+            one = frozenset([char])
+            stack.append(LiteralInfo(one, one, one, one))
+    if not stack:
+        raise ValueError("Пустое выражение")
+    return stack.pop()
+
+class RegexSearcher:
+    """Потоковый поиск вхождений (самое левое, затем самое длинное) по байтам.
+
+    Неякорный ДКА строится лениво поверх FlatNFA. Состояние ДКА -
+    упорядоченный по времени старта кортеж групп состояний НКА (как в
+    Pike VM: состояние НКА принадлежит самой ранней группе, которая в него
+    пришла). Позиции старта групп хранятся отдельным списком, поэтому
+    переходы ДКА кэшируются: (состояние, класс байта) -> (состояние, откуда
+    взялась каждая группа, номер принимающей группы); байты предварительно
+    отображаются в классы эквивалентности через 256-элементную таблицу.
+    Состояние поиска сохраняется между кусками входа; входные данные
+    (bytes, mmap, memoryview) не копируются."""
+    FRESH = (-1,)  # единственная группа, стартовавшая в текущей позиции
+
+    def __init__(self, flat_nfa, literals=None):
+        self.nfa = flat_nfa
+        self.moves = {}
+        for char, moves in flat_nfa.by_char.items():
+            if len(char) == 1 and ord(char) < 256:
+                self.moves[ord(char)] = moves
+        # Классы байтов: 0 - байты вне алфавита, далее по одному на группу
+        # байтов с одинаковыми переходами; строки кэша переходов - по классам
+        chars = [chr(b) for b in sorted(self.moves)]
+        self.byte_class = bytearray(256)
+        self.class_moves = [{}]
+        for k, cls in enumerate(symbol_classes(flat_nfa, chars), 1):
+            for char in cls:
+                self.byte_class[ord(char)] = k
+            self.class_moves.append(self.moves[ord(cls[0])])
+        # Байты, которые вообще могут входить в совпадение
+        self.alphabet = bytes(sorted(self.moves))
+        self.in_alphabet = [False] * 256
+        for byte in self.moves:
+            self.in_alphabet[byte] = True
+        # Префильтр: каждое совпадение содержит одну из этих строк
+        self.literals = None
+        self.literal_patterns = {}
+        if literals is not None and "" not in literals.required:
+            self.literals = [x.encode("latin-1") for x in sorted(literals.required)]
+            self.literal_patterns = {lit: re.compile(re.escape(lit)) for lit in self.literals}
+        self.ids = {}
+        self.groups = []
+        self.trans = []
+        start = flat_nfa.start_set
+        self.init_state = self._state_id((start,), flat_nfa.is_accepting(start))
+
+    @classmethod
+    def from_regex(cls, regex, prefilter=True):
+        postfix = regex_to_postfix(regex, log_func=quiet)
+        literals = extract_literals(postfix) if prefilter else None
+        return cls(FlatNFA(build_nfa(postfix, log_func=quiet)), literals)
+
+    def _finder(self, data):
+        """Функция find(литерал, начало) для куска входа. У memoryview нет
+        find: ищем в исходном объекте, если представление покрывает его
+        целиком, а иначе - через re прямо по буферу, тоже без копирования."""
+        if hasattr(data, "find"):
+            return data.find
+        obj = getattr(data, "obj", None)
+        if (hasattr(obj, "find") and data.c_contiguous and data.itemsize == 1
+                and data.nbytes == len(obj)):
+            return obj.find
+        patterns = self.literal_patterns
+
+        def find(lit, start):
+            found = patterns[lit].search(data, start)
+            return found.start() if found else -1
+        return find
+
+    def _skip(self, data, find, rel, hits):
+        """Префильтр в состоянии простоя: ближайшая позиция >= rel, с которой
+        может начинаться совпадение. Совпадение содержит литерал и состоит
+        только из байтов алфавита, поэтому начинается не раньше начала
+        «пробега» алфавитных байтов вокруг ближайшего литерала.
+        find - поиск литерала в data (см. _finder),
+        hits - кэш следующих вхождений каждого литерала."""
+        target = len(data)
+        for lit in self.literals:
+            hit = hits.get(lit, -1)
+            if hit < rel:
+                hit = find(lit, rel)
+                if hit < 0:
+                    hit = len(data)
+                hits[lit] = hit
+            if hit < target:
+                target = hit
+        # Литерал может начинаться в этом куске и продолжаться в следующем:
+        # если вхождения нет, стартуем с начала хвостового пробега
+        in_alphabet = self.in_alphabet
+        while target > rel and in_alphabet[data[target - 1]]:
+            target -= 1
+        return target
+
+    def _state_id(self, groups, pending):
+        key = (groups, pending)
+        sid = self.ids.get(key)
+        if sid is None:
+            sid = len(self.groups)
+            self.ids[key] = sid
+            self.groups.append(key)
+            self.trans.append([None] * len(self.class_moves))
+        return sid
+
+    def _advance(self, sid, cls):
+        groups, pending = self.groups[sid]
+        moves = self.class_moves[cls]
+        final = self.nfa.final
+        claimed = set()
+        new_groups = []
+        src = []
+        for k, group in enumerate(groups):
+            nxt = set()
+            for i in group:
+                closure = moves.get(i)
+                if closure:
+                    nxt.update(closure)
+            nxt -= claimed
+            if nxt:
+                claimed |= nxt
+                new_groups.append(frozenset(nxt))
+                src.append(k)
+        accept = -1
+        for k, group in enumerate(new_groups):
+            if not final.isdisjoint(group):
+                accept = k
+                break
+        if accept >= 0:
+            # Более поздние старты уже не дадут самого левого вхождения
+            del new_groups[accept + 1:]
+            del src[accept + 1:]
+            pending = True
+        if not pending:
+            fresh = self.nfa.start_set - claimed
+            if fresh:
+                new_groups.append(frozenset(fresh))
+                src.append(-1)
+                if not final.isdisjoint(fresh):
+                    accept = len(new_groups) - 1
+                    pending = True
+        src = self.FRESH if src == [-1] else tuple(src)
+        result = (self._state_id(tuple(new_groups), pending), src, accept)
+        self.trans[sid][cls] = result
+        return result
+
+    def finditer(self, data):
+        """Вхождения в bytes/bytearray/mmap/memoryview как пары (start, end)."""
+        return self.finditer_chunks([data])
+
+    def finditer_file(self, path, chunk_size=1 << 20):
+        """Поиск по файлу: через mmap, а если не получилось - кусками."""
+        with open(path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):  # пустой файл, канал и т.п.
+                yield from self.finditer_stream(f, chunk_size)
+                return
+            with mapped:
+                yield from self.finditer(mapped)
+
+    def finditer_stream(self, reader, chunk_size=1 << 20):
+        """Поиск по объекту с методом read() (файл, sys.stdin.buffer)."""
+        return self.finditer_chunks(iter(lambda: reader.read(chunk_size), b""))
+
+    def finditer_chunks(self, chunks):
+        """Основной цикл: chunks - последовательность кусков байтов.
+        Смещения в (start, end) абсолютные от начала потока."""
+        chunks = iter(chunks)
+        data = b""
+        base = 0            # абсолютное смещение data[0]
+        init = self.init_state
+        trans = self.trans
+        advance = self._advance
+        byte_class = self.byte_class
+        fresh = self.FRESH
+
+        pos = 0
+        sid = init
+        starts = [0]
+        best = (0, 0) if self.groups[init][1] else None
+        use_skip = self.literals is not None
+        find = None
+        hits = {}
+
+        while True:
+            rel = pos - base
+            if use_skip and sid == init and best is None and rel < len(data):
+                if find is None:
+                    find = self._finder(data)
+                skipped = self._skip(data, find, rel, hits)
+                if skipped > rel:
+                    pos = base + skipped
+                    rel = skipped
+                    starts = [pos]
+            if rel >= len(data):
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    # Оставляем хвост, только если вхождение ещё не выдано
+                    keep = best[1] if best else pos
+                    tail = data[keep - base:]
+                    data = bytes(tail) + bytes(chunk) if len(tail) else chunk
+                    base = keep
+                    find = None
+                    hits = {}
+                    continue
+                if best is None:
+                    return
+                # Конец входа: выдаём последнее найденное вхождение
+                yield best
+                pos = best[1] if best[1] > best[0] else best[1] + 1
+                if pos > base + len(data):
+                    return
+                sid, starts = init, [pos]
+                best = (pos, pos) if self.groups[init][1] else None
+                continue
+
+            cls = byte_class[data[rel]]
+            step = trans[sid][cls]
+            if step is None:
+                step = advance(sid, cls)
+            sid, src, accept = step
+            pos += 1
+            if src is fresh:
+                starts = [pos]
+            else:
+                starts = [starts[k] if k >= 0 else pos for k in src]
+            if accept >= 0:
+                best = (starts[accept], pos)
+            if not src:
+                # Все группы умерли - лучшее вхождение окончательно
+                if best is not None:
+                    yield best
+                    pos = best[1] if best[1] > best[0] else best[1] + 1
+                sid, starts = init, [pos]
+                best = (pos, pos) if self.groups[init][1] else None
+
+def benchmark_prefilter(size=4_000_000, regex="(a|b)*abb", seed=0):
+    """Поиск по тексту с редкими совпадениями: с префильтром и без."""
+    rnd = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "elit", "sed"]
+    parts = []
+    length = 0
+    while length < size:
+        word = rnd.choice(words) if rnd.random() > 0.001 else "babb"
+        parts.append(word)
+        length += len(word) + 1
+    text = " ".join(parts).encode()
+
+    results = []
+    for prefilter in (False, True):
+        searcher = RegexSearcher.from_regex(regex, prefilter=prefilter)
+        t0 = time.perf_counter()
+        spans = list(searcher.finditer(text))
+        results.append((time.perf_counter() - t0, spans))
+    (slow, spans_slow), (fast, spans_fast) = results
+    assert spans_slow == spans_fast
+    print(f"Текст: {len(text)} байт, выражение {regex}, вхождений: {len(spans_fast)}")
+    print(f"  без префильтра: {slow:8.3f} с")
+    print(f"  с префильтром:  {fast:8.3f} с  (x{slow / max(fast, 1e-9):.1f})")
+
+def benchmark_construction(repeats=3):
+    """Построение ДКА: Томпсон + метод подмножеств, followpos и производные."""
+    count = lambda dfa: len({dfa.start_state} | {q for q, _ in dfa.transitions} | set(dfa.transitions.values()))
+    patterns = [
+        "(a|b)*abb",
+        "(a|b)*a" + "(a|b)" * 10,
+        "(ab|ba|aa)*" + "ab" * 200,
+        "(" + "|".join("abcdefgh"[i % 8] * (i % 5 + 1) for i in range(40)) + ")*c",
+    ]
+    print("Построение ДКА (время на выражение, число состояний):")
+    for regex in patterns:
+        postfix = regex_to_postfix(regex, log_func=quiet)
+        alphabet = sorted(set(c for c in regex if c.isalnum()))
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            via_nfa = nfa_to_dfa(build_nfa(postfix, log_func=quiet), alphabet, log_func=quiet)
+        t1 = time.perf_counter()
+        for _ in range(repeats):
+            direct = regex_to_dfa(postfix, alphabet, log_func=quiet)
+        t2 = time.perf_counter()
+        for _ in range(repeats):
+            derived = DerivativeMatcher(postfix).to_dfa(alphabet, log_func=quiet)
+        t3 = time.perf_counter()
+        label = regex if len(regex) <= 30 else regex[:27] + "..."
+        print(f"  {label:30} Томпсон: {(t1 - t0) / repeats:7.3f} с ({count(via_nfa)} сост.), "
+              f"followpos: {(t2 - t1) / repeats:7.3f} с ({count(direct)} сост.), "
+              f"производные: {(t3 - t2) / repeats:7.3f} с ({count(derived)} сост.)")
+
+def benchmark_simulation(length=20000, seed=0):
+    """Моделирование НКА: множества State, FlatNFA и битово-параллельное."""
+    rnd = random.Random(seed)
+    text = "".join(rnd.choice("ab") for _ in range(length))
+    print(f"Моделирование НКА на строке длины {length}:")
+    for regex in ("(a|b)*abb", "(a|b)*a" + "(a|b)" * 10, "(a|b)*a" + "(a|b)" * 100):
+        postfix = regex_to_postfix(regex, log_func=quiet)
+        nfa = build_nfa(postfix, log_func=quiet)
+        timings = []
+        for matcher in (nfa, FlatNFA(nfa), BitParallelNFA(postfix)):
+            t0 = time.perf_counter()
+            simulate_nfa(matcher, text)
+            timings.append(time.perf_counter() - t0)
+        label = regex if len(regex) <= 30 else regex[:27] + "..."
+        print(f"  {label:30} State: {timings[0]:7.3f} с, FlatNFA: {timings[1]:7.3f} с, "
+              f"бит-параллельно: {timings[2]:7.3f} с ({matcher})")
+
+def run_benchmarks():
+    benchmark_prefilter()
+    benchmark_construction()
+    benchmark_simulation()
+    return 0
+
+def search_cli(argv):
+    """Консольный поиск: main.py --search REGEX [FILE ...] (без файлов - stdin)."""
+    parser = argparse.ArgumentParser(prog="main.py --search",
+                                     description="Поиск вхождений регулярного выражения")
+    parser.add_argument("regex")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20)
+    args = parser.parse_args(argv)
+
+    searcher = RegexSearcher.from_regex(args.regex)
+    out = sys.stdout
+    if not args.files:
+        for start, end in searcher.finditer_stream(sys.stdin.buffer, args.chunk_size):
+            out.write(f"{start}\t{end}\n")
+        return 0
+    for path in args.files:
+        prefix = f"{path}\t" if len(args.files) > 1 else ""
+        for start, end in searcher.finditer_file(path, args.chunk_size):
+            out.write(f"{prefix}{start}\t{end}\n")
+    return 0
+
+_batch_strings = None  # Проверяемые строки в процессе-исполнителе (см. _batch_init)
+
+def _batch_init(strings):
+    global _batch_strings
+    _batch_strings = strings
+
+def _batch_run(task):
+    """Компиляция и проверка части выражений в процессе пула."""
+    results = []
+    for index, regex in task:
+        record = {"index": index, "pattern": regex}
+        t0 = time.perf_counter()
+        try:
+            compiled = _compile_uncached(regex)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["compile_ms"] = (time.perf_counter() - t0) * 1000
+            results.append(record)
+            continue
+        t1 = time.perf_counter()
+        accepts = compiled.accepts
+        matched = [i for i, s in enumerate(_batch_strings) if accepts(s)]
+        t2 = time.perf_counter()
+        record.update(states=len(compiled.rows), matched=matched,
+                      compile_ms=(t1 - t0) * 1000, match_ms=(t2 - t1) * 1000)
+        results.append(record)
+    return results
+
+def batch_cli(argv):
+    """Пакетный режим без GUI: python -m main --batch PATTERNS [STRINGS].
+
+    PATTERNS - файл с выражениями (по одному в строке), STRINGS - файл
+    проверяемых строк (без него - stdin). Выражения компилируются и
+    проверяются в пуле процессов; результат - JSONL: по строке на
+    выражение (номера принятых строк, время компиляции и проверки) и
+    итоговая строка с временем фаз."""
+    parser = argparse.ArgumentParser(prog="main.py --batch",
+                                     description="Пакетная проверка выражений на наборе строк")
+    parser.add_argument("patterns")
+    parser.add_argument("strings", nargs="?")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=16, help="выражений на одно задание пула")
+    parser.add_argument("--output", default=None, help="файл JSONL (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with open(args.patterns, encoding="utf-8") as f:
+        patterns = [line.strip() for line in f if line.strip()]
+    if args.strings:
+        with open(args.strings, encoding="utf-8") as f:
+            strings = [line.rstrip("\r\n") for line in f]
+    else:
+        strings = [line.rstrip("\r\n") for line in sys.stdin]
+    t1 = time.perf_counter()
+
+    indexed = list(enumerate(patterns))
+    chunk = max(1, args.chunk)
+    tasks = [indexed[i:i + chunk] for i in range(0, len(indexed), chunk)]
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    errors = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_batch_init,
+                                 initargs=(strings,)) as pool:
+            for results in pool.map(_batch_run, tasks):
+                for record in results:
+                    errors += "error" in record
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        t2 = time.perf_counter()
+        summary = {"patterns": len(patterns), "strings": len(strings), "errors": errors,
+                   "read_ms": (t1 - t0) * 1000, "pool_ms": (t2 - t1) * 1000}
+        out.write(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
 # --- 3. Графический интерфейс ---
 
+class LogSink:
+    """Буферизованный вывод лога в текстовый виджет.
+
+    Сообщения копятся в списке и переносятся в виджет пачками через
+    after(): одна вставка на пачку вместо переключения состояния виджета
+    и прокрутки на каждую строку. Вызов sink(message) - лог для функций
+    построения: при level ниже LOG_STEPS он отбрасывается, а подробные
+    сообщения функции по log_level(sink) даже не формируют."""
+    FLUSH_MS = 30
+    CHUNK = 5000  # Строк за одну вставку, чтобы интерфейс не замирал
+
+    def __init__(self, root, widget, level=LOG_DETAIL):
+        self.root = root
+        self.widget = widget
+        self.level = level
+        self.pending = []
+        self.scheduled = None
+
+    def __call__(self, message):
+        if self.level >= LOG_STEPS:
+            self.write(message)
+
+    def write(self, message):
+        """Сообщение, выводимое при любом уровне (результаты проверок)."""
+        self.pending.append(message)
+        if self.scheduled is None:
+            self.scheduled = self.root.after(self.FLUSH_MS, self._flush_chunk)
+
+    def _flush_chunk(self):
+        self.scheduled = None
+        chunk = self.pending[:self.CHUNK]
+        del self.pending[:self.CHUNK]
+        self._insert(chunk)
+        if self.pending:
+            self.scheduled = self.root.after(1, self._flush_chunk)
+
+    def _cancel(self):
+        if self.scheduled is not None:
+            self.root.after_cancel(self.scheduled)
+            self.scheduled = None
+
+    def flush(self):
+        """Сразу вывести всё накопленное (например, перед чтением виджета)."""
+        self._cancel()
+        if self.pending:
+            self._insert(self.pending)
+            self.pending = []
+
+    def clear(self):
+        self._cancel()
+        self.pending = []
+        self.widget.config(state='normal')
+        self.widget.delete(1.0, tk.END)
+        self.widget.config(state='disabled')
+
+    def _insert(self, lines):
+        self.widget.config(state='normal')
+        self.widget.insert(tk.END, "\n".join(lines) + "\n")
+        self.widget.see(tk.END)
+        self.widget.config(state='disabled')
+
 class RegexApp:
+    DFA_STATE_BUDGET = 5000  # Сверх этого ДКА не строится целиком
+    DFA_METHODS = ("Томпсон + подмножества", "Ленивый ДКА", "ДКА по followpos", "Производные")
+    LOG_LEVELS = {"Лог: подробно": LOG_DETAIL, "Лог: этапы": LOG_STEPS, "Лог: выкл.": 0}
+
     def __init__(self, root):
         self.root = root
         self.root.title("Курсовая работа: Regex -> NFA -> DFA")
         self.root.geometry("800x700")
         
         self.nfa = None
+        self.flat_nfa = None
+        self.nfa_matcher = None
         self.dfa = None
         self.alphabet = []
         
@@ -275,12 +2121,20 @@ class RegexApp:
         btn_calc = ttk.Button(input_frame, text="Расчёты (Построить)", command=self.build_automata)
         btn_calc.pack(side="left", padx=5)
 
+        self.method_var = tk.StringVar(value=self.DFA_METHODS[0])
+        ttk.Combobox(input_frame, textvariable=self.method_var, values=self.DFA_METHODS,
+                     state="readonly", width=22).pack(side="left", padx=5)
+        self.log_level_var = tk.StringVar(value=next(iter(self.LOG_LEVELS)))
+        ttk.Combobox(input_frame, textvariable=self.log_level_var, values=list(self.LOG_LEVELS),
+                     state="readonly", width=14).pack(side="left", padx=5)
+
         # Панель лога
         log_frame = ttk.LabelFrame(self.root, text="Ход преобразований", padding=10)
         log_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
         self.log_area = scrolledtext.ScrolledText(log_frame, state='disabled', font=("Consolas", 10))
         self.log_area.pack(fill="both", expand=True)
+        self.log_sink = LogSink(self.root, self.log_area)
 
         # Панель тестирования
         test_frame = ttk.LabelFrame(self.root, text="Проверка эквивалентности", padding=10)
@@ -299,21 +2153,16 @@ class RegexApp:
         # Автоматический тест
         f2 = ttk.Frame(test_frame)
         f2.pack(fill="x", pady=5)
-        ttk.Label(f2, text="Авто-тест (генерация цепочек):").pack(side="left")
-        ttk.Button(f2, text="Сгенерировать и проверить 20 строк", command=self.auto_verify).pack(side="left", padx=10)
+        ttk.Label(f2, text="Авто-тест (обход всех цепочек):").pack(side="left")
+        ttk.Button(f2, text="Проверить эквивалентность", command=self.auto_verify).pack(side="left", padx=10)
 
     # --- Логика GUI ---
 
     def log(self, message):
-        self.log_area.config(state='normal')
-        self.log_area.insert(tk.END, message + "\n")
-        self.log_area.see(tk.END)
-        self.log_area.config(state='disabled')
+        self.log_sink.write(message)
 
     def clear_log(self):
-        self.log_area.config(state='normal')
-        self.log_area.delete(1.0, tk.END)
-        self.log_area.config(state='disabled')
+        self.log_sink.clear()
 
     def show_author(self):
         messagebox.showinfo("Автор", "Студент: Лацук А.Ю.\nГруппа: ИП-211")
@@ -337,6 +2186,7 @@ class RegexApp:
         messagebox.showinfo("Справка", msg)
 
     def save_to_file(self):
+        self.log_sink.flush()
         text_content = self.log_area.get("1.0", tk.END).strip()
         if not text_content:
             messagebox.showwarning("Внимание", "Нет данных для сохранения.")
@@ -361,22 +2211,52 @@ class RegexApp:
             return
 
         self.clear_log()
+        self.log_sink.level = self.LOG_LEVELS[self.log_level_var.get()]
         self.nfa = None
+        self.flat_nfa = None
+        self.nfa_matcher = None
         self.dfa = None
-        State._id_counter = 0 # Важно: сброс ID
 
         try:
             self.log(f"--- НАЧАЛО РАСЧЁТА ДЛЯ: {regex} ---")
-            postfix = regex_to_postfix(regex, log_func=self.log)
-            self.nfa = build_nfa(postfix, log_func=self.log)
+            postfix = regex_to_postfix(regex, log_func=self.log_sink)
+            self.nfa = build_nfa(postfix, log_func=self.log_sink)
+            self.flat_nfa = FlatNFA(self.nfa)
+            self.nfa_matcher = nfa_matcher(postfix)
+            self.log(f"Моделирование НКА при проверке строк: {self.nfa_matcher}")
             
             # Извлекаем алфавит из выражения для DKA
             self.alphabet = sorted(list(set(c for c in regex if c.isalnum())))
             self.log(f"Алфавит: {self.alphabet}")
             
-            self.dfa = nfa_to_dfa(self.nfa, self.alphabet, log_func=self.log)
-            
-            self.log(f"\nФинальные состояния ДКА: {self.dfa.final_states}")
+            method = self.method_var.get()
+            if method == "Ленивый ДКА":
+                self.dfa = LazyDFA(self.flat_nfa, max_states=self.DFA_STATE_BUDGET)
+                self.log("\n3. Ленивый ДКА: состояния строятся при проверке строк.")
+            elif method == "ДКА по followpos":
+                self.dfa = regex_to_dfa(postfix, self.alphabet, log_func=self.log_sink,
+                                        max_states=self.DFA_STATE_BUDGET)
+                if self.dfa is None:
+                    self.dfa = LazyDFA(self.flat_nfa, max_states=self.DFA_STATE_BUDGET)
+                    self.log("\nДКА по followpos слишком велик, проверка строк идёт через ленивый ДКА.")
+                else:
+                    self.log(f"\nФинальные состояния ДКА: {self.dfa.final_states}")
+            elif method == "Производные":
+                matcher = DerivativeMatcher(postfix)
+                self.dfa = matcher.to_dfa(self.alphabet, log_func=self.log_sink,
+                                          max_states=self.DFA_STATE_BUDGET)
+                if self.dfa is matcher:
+                    self.log(f"\nПроверка строк идёт по производным: {matcher}")
+                else:
+                    self.log(f"\nФинальные состояния ДКА: {self.dfa.final_states}")
+            else:
+                self.dfa = nfa_to_dfa(self.nfa, self.alphabet, log_func=self.log_sink,
+                                      max_states=self.DFA_STATE_BUDGET)
+                if isinstance(self.dfa, HybridMatcher):
+                    self.log(f"\nДКА построен частично ({self.dfa.states_built} состояний), "
+                             f"проверка строк идёт через гибридное моделирование.")
+                else:
+                    self.log(f"\nФинальные состояния ДКА: {self.dfa.final_states}")
             self.log("--- ПОСТРОЕНИЕ ЗАВЕРШЕНО ---\n")
             messagebox.showinfo("Готово", "Автоматы успешно построены!")
             
@@ -390,7 +2270,7 @@ class RegexApp:
             return
         
         s = self.test_entry.get().strip()
-        res_nfa = simulate_nfa(self.nfa, s)
+        res_nfa = simulate_nfa(self.nfa_matcher, s)
         res_dfa = simulate_dfa(self.dfa, s)
         
         color = "green" if res_dfa else "red"
@@ -401,44 +2281,37 @@ class RegexApp:
         self.log(f"Тест '{s}': {res_text}")
 
     def auto_verify(self):
-        """Генерация случайных цепочек для проверки эквивалентности"""
+        """Точная проверка эквивалентности НКА и ДКА (обход произведения)"""
         if not self.nfa or not self.dfa:
             messagebox.showwarning("Внимание", "Сначала выполните расчёты!")
             return
 
-        if not self.alphabet:
-            self.alphabet = ['a', 'b'] # Дефолтный, если вдруг пустой
+        self.log("\n--- ЗАПУСК ПРОВЕРКИ ЭКВИВАЛЕНТНОСТИ ---")
+        t0 = time.perf_counter()
+        counterexample = find_counterexample(self.flat_nfa, self.dfa)
+        elapsed = time.perf_counter() - t0
 
-        self.log("\n--- ЗАПУСК АВТОМАТИЧЕСКОЙ ПРОВЕРКИ ---")
-        errors = 0
-        count = 20
-        
-        # Генерируем строки разной длины
-        test_set = [""] # Всегда проверяем пустую строку
-        for _ in range(count):
-            length = random.randint(1, 8)
-            s = "".join(random.choice(self.alphabet) for _ in range(length))
-            test_set.append(s)
-            
-        for s in test_set:
-            res_nfa = simulate_nfa(self.nfa, s)
-            res_dfa = simulate_dfa(self.dfa, s)
-            
-            match_icon = "MATCH" if res_nfa == res_dfa else "ERROR"
-            if res_nfa != res_dfa:
-                errors += 1
-                
-            self.log(f"Str: '{s:10}' | NFA: {str(res_nfa):5} | DFA: {str(res_dfa):5} -> {match_icon}")
-
-        result_msg = f"Проверено строк: {len(test_set)}. Ошибок: {errors}."
-        self.log(f"--- ИТОГ: {result_msg} ---")
-        
-        if errors == 0:
+        if counterexample is None:
+            result_msg = f"НКА и ДКА эквивалентны (проверка заняла {elapsed:.3f} с)."
+            self.log(f"--- ИТОГ: {result_msg} ---")
             messagebox.showinfo("Результат теста", f"Эквивалентность подтверждена!\n{result_msg}")
         else:
+            res_nfa = simulate_nfa(self.nfa_matcher, counterexample)
+            res_dfa = simulate_dfa(self.dfa, counterexample)
+            result_msg = f"Кратчайший контрпример: '{counterexample}' (НКА: {res_nfa}, ДКА: {res_dfa})."
+            self.log(f"--- ИТОГ: {result_msg} ---")
             messagebox.showerror("Результат теста", f"Найдены расхождения!\n{result_msg}")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--search":
+        sys.exit(search_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        sys.exit(run_benchmarks())
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        sys.exit(batch_cli(sys.argv[2:]))
+    if tk is None:
+        sys.exit("tkinter не установлен: доступны только режимы --search, --batch и --bench")
+
     root = tk.Tk()
     # Применение стиля для улучшения внешнего вида
     style = ttk.Style()
@@ -1,5 +1,14 @@
+import random
+import sys
+import time
+from array import array
 from collections import defaultdict, deque
-from typing import Set, Dict, Tuple, FrozenSet
+from typing import Set, Dict, Tuple, FrozenSet, Optional, List
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для пакетной проверки
+    np = None
 
 class DFA:
     def __init__(self, states: Set[str], alphabet: Set[str],
@@ -18,6 +27,9 @@ class DFA:
                 self.transitions[(s, a)] = {tgt}
         self.start_state = start_state
         self.final_states = set(final_states)
+        # Заполняются nfa_to_dfa(subset_names=False): состояние -> битовая маска НКА
+        self.subset_masks: Optional[Dict[str, int]] = None
+        self.subset_universe: Tuple[str, ...] = ()
 
     def is_deterministic(self) -> bool:
         for (s, a), targets in self.transitions.items():
@@ -25,38 +37,98 @@ class DFA:
                 return False
         return True
 
-    def nfa_to_dfa(self):
-        start_subset = frozenset({self.start_state})
-        queue = deque([start_subset])
-        seen = {start_subset}
-        dfa_states: Set[FrozenSet[str]] = set()
+    def symbol_classes(self) -> List[List[str]]:
+        """Разбиение алфавита на классы символов, которые ведут себя одинаково
+        во всех переходах. Классы упорядочены по первому символу."""
+        columns: Dict[str, Dict[str, FrozenSet[str]]] = defaultdict(dict)
+        for (s, a), targets in self.transitions.items():
+            if targets and a in self.alphabet:
+                columns[a][s] = frozenset(targets)
+        groups: Dict[FrozenSet, List[str]] = {}
+        for a in sorted(self.alphabet):
+            groups.setdefault(frozenset(columns[a].items()), []).append(a)
+        return sorted(groups.values())
+
+    def nfa_to_dfa(self, subset_names=True, max_states=None, cache_size=4096):
+        """Детерминизация методом подмножеств на битовых масках.
+
+        При subset_names=False состояния ДКА называются D0, D1, ...,
+        а имя подмножества строится по требованию через subset_name().
+        Если задан max_states и ДКА получается больше, возвращается
+        HybridMatcher: уже построенные состояния плюс моделирование НКА
+        с ограниченным кэшем (cache_size) для остальных."""
+        bits, masks, rows, complete = self._subset_construction(max_states)
+        if not complete:
+            return HybridMatcher(bits, masks, rows, cache_size)
+        order = bits.order
+        final_mask = bits.final_mask
+
+        if subset_names:
+            names = [self._name_of_mask(m, order) for m in masks]
+        else:
+            names = [f"D{i}" for i in range(len(masks))]
+
         dfa_trans: Dict[Tuple[str, str], Set[str]] = {}
-        dfa_final_states: Set[str] = set()
+        for i, row in enumerate(rows):
+            for k, j in enumerate(row):
+                if j >= 0:
+                    for a in bits.classes[k]:
+                        dfa_trans[(names[i], a)] = {names[j]}
+        dfa_final_states = {names[i] for i, m in enumerate(masks) if m & final_mask}
 
-        while queue:
-            subset = queue.popleft()
-            dfa_states.add(subset)
-            subset_name = self._name_of_subset(subset)
-            if any(s in self.final_states for s in subset):
-                dfa_final_states.add(subset_name)
-            
-            for a in sorted(self.alphabet):
-                move_set = set()
-                for s in subset:
-                    move_set |= self.transitions.get((s, a), set())
-                if not move_set:
+        dfa = DFA(set(names), self.alphabet, dfa_trans, names[0], dfa_final_states)
+        if not subset_names:
+            dfa.subset_masks = dict(zip(names, masks))
+            dfa.subset_universe = tuple(order)
+        return dfa
+
+    def _subset_construction(self, max_states=None):
+        """Ядро метода подмножеств на BitNFA.
+
+        Возвращает (BitNFA, маски состояний ДКА, строки переходов ДКА
+        с -1 для отсутствующих, признак полноты). Если число состояний
+        превысило бы max_states, построение прерывается: строки есть
+        только у полностью обработанных состояний, complete = False."""
+        bits = BitNFA(self)
+        n_symbols = len(bits.classes)
+        move = bits.move
+        ids = {bits.start_mask: 0}
+        masks = [bits.start_mask]
+        rows = []
+        i = 0
+        while i < len(masks):
+            mask = masks[i]
+            i += 1
+            row = []
+            for k in range(n_symbols):
+                dest = move(mask, k)
+                if not dest:
+                    row.append(-1)
                     continue
-                dest = frozenset(sorted(move_set))
-                dest_name = self._name_of_subset(dest)
-                dfa_trans[(subset_name, a)] = {dest_name}
-                
-                if dest not in seen:
-                    seen.add(dest)
-                    queue.append(dest)
+                j = ids.get(dest)
+                if j is None:
+                    if max_states is not None and len(masks) >= max_states:
+                        return bits, masks, rows, False
+                    j = len(masks)
+                    ids[dest] = j
+                    masks.append(dest)
+                row.append(j)
+            rows.append(row)
+        return bits, masks, rows, True
+
+    def _name_of_mask(self, mask: int, order) -> str:
+        members = []
+        while mask:
+            low = mask & -mask
+            members.append(order[low.bit_length() - 1])
+            mask ^= low
+        return self._name_of_subset(frozenset(members))
 
-        names = {self._name_of_subset(s) for s in dfa_states}
-        dfa_start = self._name_of_subset(start_subset)
-        return DFA(names, self.alphabet, dfa_trans, dfa_start, dfa_final_states)
+    def subset_name(self, state: str) -> str:
+        """Имя подмножества НКА для состояния, полученного nfa_to_dfa(subset_names=False)."""
+        if self.subset_masks is None or state not in self.subset_masks:
+            return state
+        return self._name_of_mask(self.subset_masks[state], self.subset_universe)
 
     def _name_of_subset(self, subset: FrozenSet[str]) -> str:
         if not subset:
@@ -86,13 +158,20 @@ class DFA:
         blocks_str = ["{" + ",".join(b) + "}" for b in blocks]
         return "[" + ", ".join(blocks_str) + "]"
 
-    def minimize(self):
+    def minimize(self, explain=False):
+        """Минимизация ДКА.
+
+        По умолчанию используется алгоритм Хопкрофта (O(n log n)).
+        При explain=True выполняется пошаговое разбиение Мура с печатью R(i).
+        """
         if not self.is_deterministic():
-            print("Автомат не детерминированный. Выполняется детерминизация...")
-            dfa = self.nfa_to_dfa()
-            print("=== Результат детерминизации ===")
-            dfa.pretty_print()
-            return dfa.minimize()
+            if explain:
+                print("Автомат не детерминированный. Выполняется детерминизация...")
+            dfa = self.nfa_to_dfa(subset_names=explain)
+            if explain:
+                print("=== Результат детерминизации ===")
+                dfa.pretty_print()
+            return dfa.minimize(explain=explain)
         det_trans: Dict[str, Dict[str, str]] = {}
         for s in self.states:
             det_trans[s] = {}
@@ -106,13 +185,35 @@ class DFA:
         reachable = self._reachable_states(self.start_state)
         states = set(reachable)
         unreachable = self.states - reachable
-        if unreachable:
+        if unreachable and explain:
             print(f"Удалены недостижимые состояния: {sorted(unreachable)}")
         
         if not states:
-             print("\nАвтомат пуст (нет достижимых состояний). Минимизация не требуется.")
+             if explain:
+                 print("\nАвтомат пуст (нет достижимых состояний). Минимизация не требуется.")
              return self 
 
+        if explain:
+            partitions = self._moore_partitions(states, det_trans)
+        else:
+            partitions = self._hopcroft_partitions(states, det_trans)
+        return self._quotient(partitions, states, det_trans)
+
+    def _moore_partitions(self, states, det_trans):
+        """Пошаговое разбиение Мура с печатью R(i) (режим explain).
+
+        Как и в алгоритме Хопкрофта, неопределённые переходы ведут в явное
+        «мёртвое» состояние; после разбиения оно из блоков удаляется, так что
+        оба режима дают один и тот же минимальный автомат."""
+        dead = None
+        if any(a not in det_trans[s] for s in states for a in self.alphabet):
+            dead = "∅"
+            while dead in self.states:
+                dead += "'"
+            det_trans = {s: {a: det_trans[s].get(a, dead) for a in self.alphabet} for s in states}
+            det_trans[dead] = {a: dead for a in self.alphabet}
+            states = states | {dead}
+            print(f"\nДобавлено мёртвое состояние {dead} для неопределённых переходов.")
         finals = {s for s in states if s in self.final_states}
         non_finals = states - finals
         partitions = []
@@ -169,7 +270,95 @@ class DFA:
             print(f"R({iter_idx}) =", self._format_partitions(new_partitions))
             iter_idx += 1
             partitions = new_partitions
-        
+        if dead is not None:
+            partitions = [block - {dead} for block in partitions if block != {dead}]
+        return partitions
+
+    def _hopcroft_partitions(self, states, det_trans):
+        """Алгоритм Хопкрофта: очередь разделителей, индекс состояние->блок
+        и обратные переходы. Отсутствующие переходы ведут в фиктивное
+        «мёртвое» состояние, которое в результат не попадает."""
+        order = sorted(states)
+        index = {s: i for i, s in enumerate(order)}
+        # Одинаково ведущие себя символы дают одинаковые разбиения: берём по одному из класса
+        symbols = [cls[0] for cls in self.symbol_classes()]
+        n = len(order)
+        dead = n
+        need_dead = False
+
+        # inverse[k][j] - состояния, из которых по классу символов k есть переход в j
+        inverse = [[[] for _ in range(n + 1)] for _ in symbols]
+        for i, s in enumerate(order):
+            row = det_trans[s]
+            for k, a in enumerate(symbols):
+                tgt = row.get(a)
+                if tgt is None:
+                    need_dead = True
+                    inverse[k][dead].append(i)
+                else:
+                    inverse[k][index[tgt]].append(i)
+        if need_dead:
+            for k in range(len(symbols)):
+                inverse[k][dead].append(dead)
+
+        finals = {index[s] for s in states if s in self.final_states}
+        non_finals = set(range(n)) - finals
+        if need_dead:
+            non_finals.add(dead)
+        blocks = [b for b in (finals, non_finals) if b]
+        block_of = [0] * (n + 1)
+        for b, block in enumerate(blocks):
+            for i in block:
+                block_of[i] = b
+
+        worklist = deque()
+        in_work = set()
+        if len(blocks) == 2:
+            smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+            for k in range(len(symbols)):
+                worklist.append((smaller, k))
+                in_work.add((smaller, k))
+
+        while worklist:
+            splitter_idx, k = worklist.popleft()
+            in_work.discard((splitter_idx, k))
+            inv = inverse[k]
+            touched = defaultdict(list)
+            for q in list(blocks[splitter_idx]):
+                for p in inv[q]:
+                    touched[block_of[p]].append(p)
+
+            for y, members in touched.items():
+                block = blocks[y]
+                if len(members) == len(block):
+                    continue
+                # В новый блок выносим меньшую часть - отсюда O(n log n)
+                if 2 * len(members) <= len(block):
+                    moved = set(members)
+                else:
+                    moved = block.difference(members)
+                block -= moved
+                new_idx = len(blocks)
+                blocks.append(moved)
+                for p in moved:
+                    block_of[p] = new_idx
+                for c in range(len(symbols)):
+                    if (y, c) in in_work:
+                        worklist.append((new_idx, c))
+                        in_work.add((new_idx, c))
+                    else:
+                        pick = y if len(block) <= len(moved) else new_idx
+                        worklist.append((pick, c))
+                        in_work.add((pick, c))
+
+        partitions = []
+        for block in blocks:
+            real = {order[i] for i in block if i != dead}
+            if real:
+                partitions.append(real)
+        return partitions
+
+    def _quotient(self, partitions, states, det_trans):
         block_map: Dict[str, str] = {}
         block_names: Dict[FrozenSet[str], str] = {}
         
@@ -192,16 +381,40 @@ class DFA:
 
         new_trans = {}
         for block in sorted_partitions:
-            rep = next(iter(block))
+            rep = min(block)
             block_name = block_map[rep]
             
             for a in sorted(self.alphabet):
-                tgt = det_trans[rep][a]
+                tgt = det_trans[rep].get(a)
+                if tgt is None:
+                    continue
                 tgt_block_name = block_map[tgt]
                 new_trans[(block_name, a)] = {tgt_block_name}
 
         return DFA(new_states, self.alphabet, new_trans, new_start, new_finals)
 
+    def compile(self, max_states=None, cache_size=4096):
+        """Компиляция в плотную таблицу переходов (см. CompiledDFA).
+
+        Недетерминированный автомат предварительно детерминизируется;
+        при превышении max_states возвращается HybridMatcher."""
+        if self.is_deterministic():
+            return CompiledDFA(self)
+        # Строки метода подмножеств сразу идут в таблицу, минуя словарь переходов
+        bits, masks, rows, complete = self._subset_construction(max_states)
+        if not complete:
+            return HybridMatcher(bits, masks, rows, cache_size)
+        return CompiledDFA.from_rows([f"D{i}" for i in range(len(masks))],
+                                     bits.symbols, rows,
+                                     [bool(m & bits.final_mask) for m in masks],
+                                     symbol_index=bits.sym_index)
+
+    def accepts_many(self, words=None, *, codes=None, lengths=None, compiled=None):
+        """Пакетная проверка цепочек (см. CompiledDFA.accepts_many)."""
+        if compiled is None:
+            compiled = self.compile()
+        return compiled.accepts_many(words, codes=codes, lengths=lengths)
+
     def pretty_print(self):
         if not self.states:
             print("Автомат пуст.")
@@ -222,7 +435,367 @@ class DFA:
                  print(f"  δ({s}, '{a}') -> {sorted(tg)}")
 
 
+class BitNFA:
+    """НКА с состояниями 0..n-1 и подмножествами в виде битовых масок.
+
+    Для каждого класса символов (см. DFA.symbol_classes) хранится маска
+    переходов каждого состояния: move(M, k) - это OR moves[k][i] по
+    установленным битам i маски M. Для небольших НКА (n <= TABLE_STATES)
+    дополнительно строятся таблицы по байтам маски, и move(M, k) - это
+    OR элементов tables[k][c][байт c маски M] по ненулевым байтам M;
+    у больших НКА такие таблицы заняли бы Θ(n^2) памяти."""
+    TABLE_STATES = 512
+
+    def __init__(self, nfa: DFA):
+        universe = set(nfa.states) | {nfa.start_state}
+        for (q, _), targets in nfa.transitions.items():
+            universe.add(q)
+            universe |= targets
+        self.order = sorted(universe)
+        bit = {q: 1 << i for i, q in enumerate(self.order)}
+        self.symbols = sorted(nfa.alphabet)
+        # Маски строятся по классам символов; sym_index: символ -> номер класса
+        self.classes = nfa.symbol_classes()
+        self.sym_index = {a: k for k, cls in enumerate(self.classes) for a in cls}
+        n = len(self.order)
+        self.n_bytes = max(1, (n + 7) // 8)
+
+        moves = [[0] * (self.n_bytes * 8) for _ in self.classes]
+        for (q, a), targets in nfa.transitions.items():
+            k = self.sym_index.get(a)
+            if k is None:
+                continue
+            mv = moves[k]
+            i = bit[q].bit_length() - 1
+            for t in targets:
+                mv[i] |= bit[t]
+        self.moves = moves
+
+        self.tables = None
+        if n <= self.TABLE_STATES:
+            self.tables = [self._byte_tables(mv) for mv in moves]
+
+        self.final_mask = 0
+        for q in nfa.final_states:
+            if q in bit:
+                self.final_mask |= bit[q]
+        self.start_mask = bit[nfa.start_state]
+
+    def _byte_tables(self, mv):
+        per_byte = []
+        for c in range(self.n_bytes):
+            tab = [0] * 256
+            base = 8 * c
+            for v in range(1, 256):
+                low = v & -v
+                tab[v] = tab[v ^ low] | mv[base + low.bit_length() - 1]
+            per_byte.append(tab)
+        return per_byte
+
+    def move(self, mask: int, k: int) -> int:
+        dest = 0
+        if self.tables is not None:
+            per_byte = self.tables[k]
+            for c, v in enumerate(mask.to_bytes(self.n_bytes, "little")):
+                if v:
+                    dest |= per_byte[c][v]
+            return dest
+        mv = self.moves[k]
+        for c, v in enumerate(mask.to_bytes(self.n_bytes, "little")):
+            base = 8 * c
+            while v:
+                low = v & -v
+                dest |= mv[base + low.bit_length() - 1]
+                v ^= low
+        return dest
+
+
+class HybridMatcher:
+    """Результат детерминизации, прерванной по бюджету состояний.
+
+    Уже построенные состояния ДКА лежат в кэше (маска -> строка переходов),
+    остальные переходы вычисляются моделированием НКА на масках. Новые
+    состояния добавляются в кэш, пока он не заполнится (capacity)."""
+
+    def __init__(self, bits: BitNFA, masks, rows, cache_size=4096):
+        self.bits = bits
+        self.states_built = len(masks)
+        self.cache: Dict[int, list] = {}
+        for mask, row in zip(masks, rows):
+            self.cache[mask] = [masks[j] if j >= 0 else 0 for j in row]
+        self.capacity = max(cache_size, len(self.cache))
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, word) -> bool:
+        bits = self.bits
+        index = bits.sym_index
+        cache = self.cache
+        mask = bits.start_mask
+        for c in word:
+            k = index.get(c)
+            if k is None:
+                return False
+            row = cache.get(mask)
+            if row is not None and row[k] is not None:
+                self.hits += 1
+                mask = row[k]
+            else:
+                self.misses += 1
+                dest = bits.move(mask, k)
+                if row is None and len(cache) < self.capacity:
+                    row = [None] * len(bits.classes)
+                    cache[mask] = row
+                if row is not None:
+                    row[k] = dest
+                mask = dest
+            if not mask:
+                return False
+        return bool(mask & bits.final_mask)
+
+    def __repr__(self):
+        return (f"HybridMatcher(states_built={self.states_built}, cached={len(self.cache)}, "
+                f"capacity={self.capacity}, hits={self.hits}, misses={self.misses})")
+
+
+class CompiledDFA:
+    """Замороженный ДКА с состояниями и символами, пронумерованными целыми.
+
+    Символы сжаты в классы эквивалентности (DFA.symbol_classes), столбец
+    таблицы - номер класса. Переходы хранятся в плоском array('i') размера
+    (n + 1) * (k + 1), k - число классов: строка n - мёртвое состояние-сток,
+    столбец k - любой символ вне алфавита.
+    В таблице лежат уже умноженные на ширину строки смещения, поэтому
+    шаг автомата - одно индексирование: s = table[s + col].
+    """
+    __slots__ = ('state_names', 'symbols', 'symbol_index', 'symbol_columns',
+                 'n_states', 'width', 'table', 'start', 'dead', 'finals')
+
+    def __init__(self, dfa: DFA):
+        names = sorted(dfa.states)
+        state_index = {q: i for i, q in enumerate(names)}
+        classes = dfa.symbol_classes()
+        sym_index = {a: k for k, cls in enumerate(classes) for a in cls}
+        reps = {cls[0]: k for k, cls in enumerate(classes)}
+
+        rows = [[-1] * len(classes) for _ in names]
+        for (q, a), targets in dfa.transitions.items():
+            if not targets or q not in state_index or a not in reps:
+                continue
+            rows[state_index[q]][reps[a]] = state_index[next(iter(targets))]
+        finals = [q in dfa.final_states for q in names]
+        start = state_index.get(dfa.start_state, -1)
+        self._freeze(names, tuple(sorted(dfa.alphabet)), rows, finals, start, sym_index)
+
+    @classmethod
+    def from_rows(cls, names, symbols, rows, finals, start=0, symbol_index=None) -> "CompiledDFA":
+        """Сборка из уже пронумерованных строк переходов (-1 - нет перехода).
+        symbol_index отображает символ в столбец (класс); по умолчанию
+        у каждого символа свой столбец."""
+        obj = cls.__new__(cls)
+        if symbol_index is None:
+            symbol_index = {a: i for i, a in enumerate(symbols)}
+        obj._freeze(names, tuple(symbols), rows, finals, start, symbol_index)
+        return obj
+
+    def _freeze(self, names, symbols, rows, finals, start, symbol_index):
+        n = len(names)
+        width = max(symbol_index.values(), default=-1) + 2
+        dead = n * width
+
+        table = array('i', [dead]) * ((n + 1) * width)
+        for i, row in enumerate(rows):
+            base = i * width
+            for k, j in enumerate(row):
+                if j >= 0:
+                    table[base + k] = j * width
+
+        flags = bytearray(n + 1)
+        for i, is_final in enumerate(finals):
+            if is_final:
+                flags[i] = 1
+
+        setattr_ = object.__setattr__
+        setattr_(self, 'state_names', tuple(names))
+        setattr_(self, 'symbols', symbols)
+        setattr_(self, 'symbol_index', dict(symbol_index))
+        # Номер символа в symbols -> столбец: codes в accepts_many - номера символов
+        setattr_(self, 'symbol_columns', tuple(symbol_index.get(a, width - 1) for a in symbols))
+        setattr_(self, 'n_states', n)
+        setattr_(self, 'width', width)
+        setattr_(self, 'table', table)
+        setattr_(self, 'start', start * width if start >= 0 else dead)
+        setattr_(self, 'dead', dead)
+        setattr_(self, 'finals', bytes(flags))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledDFA неизменяем")
+
+    def _step_all(self, word) -> int:
+        table = self.table
+        index = self.symbol_index
+        other = self.width - 1
+        s = self.start
+        for c in word:
+            s = table[s + index.get(c, other)]
+        return s
+
+    def run(self, word) -> Optional[str]:
+        """Возвращает имя состояния после чтения word или None (мёртвое состояние)."""
+        s = self._step_all(word)
+        if s == self.dead:
+            return None
+        return self.state_names[s // self.width]
+
+    def accepts(self, word) -> bool:
+        return self.finals[self._step_all(word) // self.width] == 1
+
+    def accepts_many(self, words=None, *, codes=None, lengths=None, chunk_size=1 << 18):
+        """Пакетная проверка: список цепочек или матрица codes + вектор lengths.
+
+        codes - дополненная матрица (m, max_len) номеров символов в
+        symbols (столбцы классов находятся по symbol_columns); номера вне
+        [0, len(symbols)) считаются символами вне алфавита, хвост за
+        lengths[r] игнорируется. Все цепочки продвигаются
+        одновременно, по одному столбцу за шаг, индексированием NumPy в
+        таблицу переходов. Возвращает массив bool; без NumPy выполняется
+        обычный цикл и возвращается список."""
+        if np is None:
+            if words is not None:
+                return [self.accepts(w) for w in words]
+            if lengths is None:
+                lengths = [len(row) for row in codes]
+            return [self._run_codes(row[:n]) for row, n in zip(codes, lengths)]
+
+        if words is not None:
+            words = list(words)
+            result = np.empty(len(words), dtype=bool)
+            for lo in range(0, len(words), chunk_size):
+                batch = words[lo:lo + chunk_size]
+                result[lo:lo + len(batch)] = self._accepts_flat(*self._encode_flat(batch))
+            return result
+
+        codes = np.asarray(codes)
+        if codes.ndim != 2:
+            raise ValueError("codes должен быть двумерным массивом")
+        m, n_cols = codes.shape
+        if lengths is None:
+            lengths = np.full(m, n_cols, dtype=np.int64)
+        lengths = np.clip(np.asarray(lengths, dtype=np.int64), 0, n_cols)
+        other = self.width - 1
+        columns = np.array(self.symbol_columns + (other,), dtype=np.intp)
+        flat = codes.astype(np.intp).ravel()
+        flat[(flat < 0) | (flat >= len(self.symbols))] = len(self.symbols)
+        flat = columns[flat]
+        return self._accepts_flat(flat, np.arange(m, dtype=np.int64) * n_cols, lengths)
+
+    def _run_codes(self, row):
+        table = self.table
+        columns = self.symbol_columns
+        other = self.width - 1
+        s = self.start
+        for code in row:
+            s = table[s + (columns[code] if 0 <= code < len(columns) else other)]
+        return self.finals[s // self.width] == 1
+
+    def _encode_flat(self, words):
+        """Кодирует цепочки в один плоский массив номеров столбцов
+        (цепочки подряд) и возвращает его вместе с началами и длинами."""
+        m = len(words)
+        other = self.width - 1
+        lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=m)
+        starts = np.cumsum(lengths) - lengths
+        if all(len(a) == 1 for a in self.symbols) and all(isinstance(w, str) for w in words):
+            # Быстрый путь: все символы - одиночные кодовые точки
+            points = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+            lut = np.full(max((ord(a) for a in self.symbols), default=0) + 2, other, dtype=np.intp)
+            for a, i in self.symbol_index.items():
+                lut[ord(a)] = i
+            flat = lut[np.minimum(points, len(lut) - 1)]
+        else:
+            index = self.symbol_index
+            flat = np.fromiter((index.get(c, other) for w in words for c in w),
+                               dtype=np.intp, count=int(lengths.sum()))
+        return flat, starts, lengths
+
+    def _accepts_flat(self, flat, starts, lengths):
+        """Ядро пакетной проверки: символ j цепочки r лежит в flat[starts[r] + j]."""
+        m = len(lengths)
+        if m == 0:
+            return np.zeros(0, dtype=bool)
+        table = np.frombuffer(self.table, dtype=np.intc).astype(np.intp)
+        finals = np.frombuffer(self.finals, dtype=np.uint8).astype(bool)
+
+        # Сортируем по убыванию длины: на шаге j активен префикс из active[j] цепочек
+        order = np.argsort(-lengths, kind="stable")
+        lens = lengths[order]
+        pos = starts[order]
+        max_len = int(lens[0])
+        active = np.searchsorted(-lens, -(np.arange(max_len) + 1), side="right")
+
+        state = np.full(m, self.start, dtype=np.intp)
+        for j in range(max_len):
+            cnt = active[j]
+            state[:cnt] = table[state[:cnt] + flat[pos[:cnt] + j]]
+
+        result = np.empty(m, dtype=bool)
+        result[order] = finals[state // self.width]
+        return result
+
+    def __repr__(self):
+        return (f"CompiledDFA(states={self.n_states}, symbols={len(self.symbols)}, "
+                f"classes={self.width - 1}, "
+                f"table={len(self.table)})")
+
+
+def _python_accepts(dfa: DFA, word) -> bool:
+    """Эталонный посимвольный цикл по словарю переходов DFA."""
+    state = dfa.start_state
+    for c in word:
+        targets = dfa.transitions.get((state, c))
+        if not targets:
+            return False
+        state = next(iter(targets))
+    return state in dfa.final_states
+
+
+def benchmark_accepts_many(n_words=200_000, min_len=0, max_len=40, seed=0):
+    """Сравнение: цикл Python по словарю, CompiledDFA.accepts и accepts_many."""
+    rnd = random.Random(seed)
+    dfa = DFA({'q0', 'q1', 'q2', 'q3', 'q4'}, {'0', '1'}, {
+        ('q0', '0'): {'q0', 'q1'}, ('q0', '1'): 'q0',
+        ('q1', '0'): 'q2', ('q1', '1'): 'q2',
+        ('q2', '0'): 'q3', ('q2', '1'): 'q3',
+        ('q3', '0'): 'q4', ('q3', '1'): 'q4',
+    }, 'q0', {'q4'}).minimize()
+    compiled = dfa.compile()
+    words = ["".join(rnd.choice("01") for _ in range(rnd.randint(min_len, max_len)))
+             for _ in range(n_words)]
+    # Немного цепочек с символом вне алфавита, чтобы проверить сток
+    for i in range(0, n_words, 100):
+        words[i] += "2"
+
+    t0 = time.perf_counter()
+    expected = [_python_accepts(dfa, w) for w in words]
+    t1 = time.perf_counter()
+    single = [compiled.accepts(w) for w in words]
+    t2 = time.perf_counter()
+    batch = compiled.accepts_many(words)
+    t3 = time.perf_counter()
+
+    assert single == expected and list(batch) == expected
+    print(f"Цепочек: {n_words}, длина {min_len}..{max_len}, принято: {sum(expected)}")
+    print(f"  цикл Python (dict):      {t1 - t0:8.3f} с")
+    print(f"  CompiledDFA.accepts:     {t2 - t1:8.3f} с")
+    label = "accepts_many (NumPy):" if np is not None else "accepts_many (без NumPy):"
+    print(f"  {label:25}{t3 - t2:8.3f} с")
+
+
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark_accepts_many()
+        sys.exit(0)
+
     states = {'q0', 'q1', 'q2', 'q3', 'q4'}
     alphabet = {'0', '1'}
     transitions = {
@@ -241,9 +814,13 @@ if __name__ == "__main__":
     dfa = DFA(states, alphabet, transitions, start_state, final_states)
     print("=== Исходный автомат (пример 1) ===")
     dfa.pretty_print()
-    minimized = dfa.minimize()
+    minimized = dfa.minimize(explain=True)
     print("\n=== Минимизированный автомат ===")
     minimized.pretty_print()
+    compiled = minimized.compile()
+    print("Скомпилированная таблица:", compiled)
+    for word in ["10000", "01000", "0101"]:
+        print(f"  '{word}' -> {compiled.accepts(word)}")
 
     nfa_states = {'p', 'q', 'r'}
     nfa_alphabet = {'0', '1'}
@@ -258,6 +835,6 @@ if __name__ == "__main__":
     nfa = DFA(nfa_states, nfa_alphabet, nfa_transitions, nfa_start, nfa_finals)
     print("\n\n=== Исходный НКА (пример 2) ===")
     nfa.pretty_print()
-    minimized_from_nfa = nfa.minimize()
+    minimized_from_nfa = nfa.minimize(explain=True)
     print("\n=== Результат: НКА -> ДКА -> Минимизация ===")
     minimized_from_nfa.pretty_print()
\ No newline at end of file
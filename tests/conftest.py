@@ -0,0 +1,30 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def _load(name, relpath):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relpath)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # Нужно pickle и пулу процессов
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def albert():
+    return _load("rgr_albert", "RGR/Albert/main.py")
+
+
+@pytest.fixture(scope="session")
+def andrey():
+    return _load("rgr_andrey", "RGR/Andrey/main.py")
+
+
+@pytest.fixture(scope="session")
+def lab2():
+    return _load("lab2_main", "lab2/main.py")
@@ -0,0 +1,232 @@
+import functools
+import itertools
+import math
+
+import pytest
+
+DEFAULT = "S -> A S B | ε\nA -> a A S | a\nB -> S b S | A | b b"
+GRAMMARS = [
+    DEFAULT,
+    "S -> S S | ( S ) | ε",
+    "E -> E + T | T\nT -> T * F | F\nF -> ( E ) | a",
+    "S -> S A | A\nA -> A | S | a | ε",
+    "S -> ab S | a | bb S c",
+]
+
+
+def grammar(albert, text):
+    cfg = albert.CFG()
+    cfg.parse_from_text(text)
+    return cfg
+
+
+def brute_force(albert, cfg, max_len):
+    """Все цепочки длины <= max_len над терминалами, принятые Эрли."""
+    parser = albert.EarleyParser(cfg)
+    chars = sorted({c for t in cfg.terminals for c in t})
+    return sorted(w for n in range(max_len + 1)
+                  for w in map("".join, itertools.product(chars, repeat=n))
+                  if parser.recognize(list(w)) or parser.recognize(w))
+
+
+@pytest.mark.parametrize("text", GRAMMARS)
+def test_generator_matches_brute_force(albert, text):
+    cfg = grammar(albert, text)
+    if any(len(t) > 1 for t in cfg.terminals):
+        pytest.skip("перебор по символам не разбивает цепочку на многосимвольные терминалы")
+    expected = brute_force(albert, cfg, 6)
+    assert albert.LanguageGenerator.generate(cfg, 0, 6) == expected
+    assert albert.LanguageGenerator.generate(cfg, 3, 6) == [w for w in expected if len(w) >= 3]
+
+
+@pytest.mark.parametrize("text", GRAMMARS)
+def test_generator_same_language_for_cnf(albert, text):
+    cfg = grammar(albert, text)
+    cnf = albert.CNFConverter.to_cnf(cfg)
+    assert albert.LanguageGenerator.generate(cnf, 0, 7) == albert.LanguageGenerator.generate(cfg, 0, 7)
+
+
+def test_generator_long_lengths(albert):
+    cfg = grammar(albert, DEFAULT)
+    parser = albert.EarleyParser(cfg)
+    words = list(itertools.islice(albert.LanguageGenerator(cfg, 250).words(0, 250), 200))
+    assert words == sorted(set(words))
+    assert max(map(len, words)) >= 200
+    longest = list(itertools.islice(albert.LanguageGenerator(cfg, 200).words(200, 200), 3))
+    assert len(longest) == 3 and all(len(w) == 200 and parser.recognize(w) for w in longest)
+
+    chain = grammar(albert, "S -> a S | b")
+    assert list(albert.LanguageGenerator(chain, 400).words(400, 400)) == ["a" * 399 + "b"]
+
+
+@pytest.mark.parametrize("text", GRAMMARS)
+def test_sampler_counts_match_parse_trees(albert, text):
+    cfg = grammar(albert, text)
+    cnf = albert.CNFConverter.to_cnf(cfg)
+    sampler = albert.RandomSampler(cnf)
+    parser = albert.EarleyParser(cnf)
+    for n in range(1, 6):
+        words = albert.LanguageGenerator.generate(cnf, n, n)
+        trees = sum(parser.parse_forest(albert._tokens(w)).count_trees() for w in words)
+        if any(len(t) > 1 for t in cfg.terminals):
+            continue  # длина в терминалах и в символах различаются
+        assert sampler.count(n) == trees
+
+
+def test_sampler_is_uniform_over_strings(albert):
+    import collections
+    import random
+    cnf = albert.CNFConverter.to_cnf(grammar(albert, DEFAULT))
+    sampler = albert.RandomSampler(cnf)
+    assert sampler.earley is None
+    words = albert.LanguageGenerator.generate(cnf, 5, 5)
+    rng = random.Random(1)
+    draws = 150 * len(words)
+    counts = collections.Counter("".join(sampler.sample(5, rng)) for _ in range(draws))
+    assert set(counts) == set(words)
+    chi2 = sum((counts[w] - 150) ** 2 / 150 for w in words)
+    assert chi2 < 3 * len(words)
+
+
+def test_sampler_rejects_infeasible_uniform_sampling(albert):
+    import random
+    sampler = albert.RandomSampler(albert.CNFConverter.to_cnf(grammar(albert, DEFAULT)))
+    with pytest.raises(ValueError):
+        sampler.sample(30, random.Random(0))
+
+
+def test_sampler_long_lengths(albert):
+    import random
+    rng = random.Random(2)
+    for text, n in [(DEFAULT, 300), (GRAMMARS[2], 401)]:
+        cfg = grammar(albert, text)
+        cnf = albert.CNFConverter.to_cnf(cfg)
+        tokens = albert.RandomSampler(cnf).derivation(n, rng)
+        assert len(tokens) == n
+        assert albert.EarleyParser(cfg).recognize(tokens)
+    chain = albert.CNFConverter.to_cnf(grammar(albert, "S -> a S b | c"))
+    assert albert.RandomSampler(chain).sample(301, rng) == ["a"] * 150 + ["c"] + ["b"] * 150
+
+
+@pytest.mark.parametrize("text", GRAMMARS)
+@pytest.mark.parametrize("reverse", [False, True])
+def test_cyk_matches_earley(albert, text, reverse):
+    cfg = grammar(albert, text)
+    cyk = albert.CYKParser(albert.CNFConverter.to_cnf(cfg))
+    cyk.reverse = reverse  # Оба направления заполнения должны давать одно и то же
+    earley = albert.EarleyParser(cfg)
+    terms = sorted(cfg.terminals)
+    for n in range(6):
+        for word in itertools.product(terms, repeat=n):
+            assert cyk.recognize(list(word)) == earley.recognize(list(word)), word
+
+
+def test_cyk_long_inputs(albert):
+    import random
+    expr = grammar(albert, GRAMMARS[2])
+    cyk = albert.CYKParser(albert.CNFConverter.to_cnf(expr))
+    assert cyk.reverse  # Леворекурсивная грамматика заполняется по столбцам
+    assert cyk.recognize("a+" * 1500 + "a")
+    assert not cyk.recognize("a+" * 1500)
+
+    cfg = grammar(albert, DEFAULT)
+    cyk = albert.CYKParser(albert.CNFConverter.to_cnf(cfg))
+    word = "".join(random.Random(1).choice("ab") for _ in range(300))
+    assert cyk.recognize(word) == albert.EarleyParser(cfg).recognize(word)
+
+
+def count_trees_brute_force(cfg, tokens):
+    """Число деревьев вывода прямым разбором по всем разбиениям
+    (только для грамматик без циклов A =>+ A)."""
+    rules = {A: [tuple(s for s in prod if s) for prod in prods] for A, prods in cfg.rules.items()}
+    min_len = dict.fromkeys(rules, math.inf)
+    while True:
+        changed = False
+        for A, prods in rules.items():
+            best = min(sum(min_len.get(s, 1) for s in prod) for prod in prods)
+            if best < min_len[A]:
+                min_len[A], changed = best, True
+        if not changed:
+            break
+
+    @functools.lru_cache(maxsize=None)
+    def symbol(X, i, j):
+        if X not in rules:
+            return int(j == i + 1 and tokens[i] == X)
+        return sum(sequence(prod, i, j) for prod in rules[X])
+
+    @functools.lru_cache(maxsize=None)
+    def sequence(symbols, i, j):
+        if not symbols:
+            return int(i == j)
+        rest = sum(min_len.get(s, 1) for s in symbols[1:])
+        total = 0
+        for k in range(i, j - rest + 1):
+            left = symbol(symbols[0], i, k)
+            if left:
+                total += left * sequence(symbols[1:], k, j)
+        return total
+
+    return symbol(cfg.start_symbol, 0, len(tokens))
+
+
+def tree_yield(tree):
+    if isinstance(tree, str):
+        return [tree]
+    return [leaf for child in tree[1] for leaf in tree_yield(child)]
+
+
+@pytest.mark.parametrize("text", [DEFAULT, GRAMMARS[2], GRAMMARS[4], "E -> E + E | E * E | a"])
+def test_forest_counts_match_brute_force(albert, text):
+    cfg = grammar(albert, text)
+    parser = albert.EarleyParser(cfg)
+    terms = sorted(cfg.terminals)
+    for n in range(6):
+        for word in itertools.product(terms, repeat=n):
+            forest = parser.parse_forest(list(word))
+            expected = count_trees_brute_force(cfg, word)
+            assert forest.count_trees() == expected, word
+            trees = list(forest.trees())
+            assert len(trees) == expected
+            assert all(tree_yield(tree) == list(word) for tree in trees)
+
+
+@pytest.mark.parametrize("text", [GRAMMARS[1], GRAMMARS[3]])
+def test_forest_counts_cycles_as_infinite(albert, text):
+    cfg = grammar(albert, text)
+    parser = albert.EarleyParser(cfg)
+    for word in itertools.product(sorted(cfg.terminals), repeat=4):
+        forest = parser.parse_forest(list(word))
+        assert forest.count_trees() == (math.inf if parser.recognize(list(word)) else 0)
+
+
+def test_forest_ambiguity_scales(albert):
+    # Число деревьев для a+a+...+a (n плюсов) - число Каталана C(n)
+    parser = albert.EarleyParser(grammar(albert, "E -> E + E | a"))
+    n = 120
+    forest = parser.parse_forest("a+" * n + "a")
+    assert forest.count_trees() == math.comb(2 * n, n) // (n + 1)
+
+
+@pytest.mark.parametrize("text, n", [("S -> a S | a", 1000), ("S -> S a | a", 2000)])
+def test_forest_trees_long_inputs(albert, text, n):
+    forest = albert.EarleyParser(grammar(albert, text)).parse_forest(["a"] * n)
+    trees = list(forest.trees())
+    assert len(trees) == forest.count_trees() == 1
+    depth, tree = 0, trees[0]
+    while not isinstance(tree, str):
+        depth += 1
+        tree = max(tree[1], key=lambda child: not isinstance(child, str))
+    assert depth == n
+
+
+def test_forest_trees_order_and_laziness(albert):
+    parser = albert.EarleyParser(grammar(albert, "E -> E + E | a"))
+    trees = list(parser.parse_forest("a+a+a").trees())
+    left = ("E", [("E", [("E", ["a"]), "+", ("E", ["a"])]), "+", ("E", ["a"])])
+    right = ("E", [("E", ["a"]), "+", ("E", [("E", ["a"]), "+", ("E", ["a"])])])
+    assert sorted(map(repr, trees)) == sorted(map(repr, [left, right]))
+    forest = parser.parse_forest("a+" * 120 + "a")
+    first = list(itertools.islice(forest.trees(), 50))
+    assert len({repr(t) for t in first}) == 50
+    assert all("".join(tree_yield(t)) == "a+" * 120 + "a" for t in first)
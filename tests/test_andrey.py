@@ -0,0 +1,519 @@
+import itertools
+import json
+import pathlib
+import pickle
+import random
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+def random_regex(rnd, depth=3):
+    if depth == 0 or rnd.random() < 0.3:
+        return rnd.choice("abc")
+    kind = rnd.choice("|.*")
+    if kind == "*":
+        return f"({random_regex(rnd, depth - 1)})*"
+    left, right = random_regex(rnd, depth - 1), random_regex(rnd, depth - 1)
+    return f"({left}|{right})" if kind == "|" else left + right
+
+
+REGEXES = ["(a|b)*abb", "a(b|c)*a", "((ab)*|c)*b"] + [random_regex(random.Random(i)) for i in range(40)]
+STRINGS = ["".join(w) for n in range(6) for w in itertools.product("abc", repeat=n)]
+
+
+@pytest.mark.parametrize("regex", REGEXES)
+def test_nfa_matcher_matches_re(andrey, regex):
+    matcher = andrey.nfa_matcher(andrey.regex_to_postfix(regex, log_func=andrey.quiet))
+    assert isinstance(matcher, andrey.BitParallelNFA)
+    for s in STRINGS:
+        assert andrey.simulate_nfa(matcher, s) == bool(re.fullmatch(regex, s)), s
+
+
+def test_nfa_matcher_uses_big_int_above_word(andrey):
+    small = andrey.regex_to_postfix("(a|b)*ab" + "(a|b)" * 30, log_func=andrey.quiet)
+    assert andrey.nfa_matcher(small).word_sized  # 64 позиции
+    rnd = random.Random(0)
+    for k in (40, 100):
+        regex = "(a|b)*a" + "(a|b)" * k
+        matcher = andrey.nfa_matcher(andrey.regex_to_postfix(regex, log_func=andrey.quiet))
+        assert isinstance(matcher, andrey.BitParallelNFA) and not matcher.word_sized
+        for _ in range(50):
+            text = "".join(rnd.choice("ab") for _ in range(rnd.randint(k, 3 * k)))
+            assert andrey.simulate_nfa(matcher, text) == bool(re.fullmatch(regex, text)), text
+    regex = "(" + "|".join("ab"[i % 2] * (i % 7 + 1) for i in range(300)) + ")*c"
+    matcher = andrey.nfa_matcher(andrey.regex_to_postfix(regex, log_func=andrey.quiet))
+    assert not matcher.word_sized
+    for text in ("", "c", "abbc", "aaaaaaabbbbbbbc", "ab" * 50 + "c", "abc" * 3, "b" * 8 + "c"):
+        assert matcher.accepts(text) == bool(re.fullmatch(regex, text)), text
+
+
+@pytest.mark.parametrize("regex", REGEXES)
+def test_derivatives_match_re(andrey, regex):
+    matcher = andrey.DerivativeMatcher.from_regex(regex)
+    for s in STRINGS:
+        assert matcher.accepts(s) == bool(re.fullmatch(regex, s)), s
+
+
+@pytest.mark.parametrize("regex", ["a" * 1500, "ab" * 1000, "(ab)*" + "c" * 3000])
+def test_derivatives_long_literals(andrey, regex):
+    matcher = andrey.DerivativeMatcher.from_regex(regex)
+    text = regex.replace("(ab)*", "abab")
+    assert matcher.accepts(text) and not matcher.accepts(text[:-1])
+
+
+# У re на таких выражениях экспоненциальный откат, поэтому ответы заданы явно:
+# (a*b*)*...c принимает {a,b}*c, (a|b*)^n - строки из не более n блоков вида a или b*
+@pytest.mark.parametrize("regex, accepted, rejected", [
+    ("a*" * 2000, ["", "a", "a" * 3000], ["b", "ab", "a" * 50 + "b"]),
+    ("(a*b*)*" * 500 + "c", ["c", "ab" * 20 + "c", "bbac"], ["", "ab", "ca", "cc"]),
+    ("(a|b*)" * 1500, ["", "b" * 30, "ab" * 40, "a" * 60], ["c", "ab" * 20 + "c"]),
+], ids=["a*^2000", "(a*b*)*^500c", "(a|b*)^1500"])
+def test_derivatives_long_nullable_chains(andrey, regex, accepted, rejected):
+    matcher = andrey.DerivativeMatcher.from_regex(regex)
+    assert all(matcher.accepts(text) for text in accepted)
+    assert not any(matcher.accepts(text) for text in rejected)
+
+
+@pytest.mark.parametrize("regex", REGEXES[:20])
+def test_derivatives_with_tiny_cache(andrey, regex):
+    # Вытеснение из кэша посреди вычисления производной не должно терять подтермы
+    matcher = andrey.DerivativeMatcher.from_regex(regex, cache_size=2)
+    for s in STRINGS:
+        assert matcher.accepts(s) == bool(re.fullmatch(regex, s)), s
+    assert len(matcher.cache) <= 2
+
+
+@pytest.mark.parametrize("regex", REGEXES)
+def test_followpos_dfa_matches_re(andrey, regex):
+    postfix = andrey.regex_to_postfix(regex, log_func=andrey.quiet)
+    dfa = andrey.regex_to_dfa(postfix, sorted(set(regex) & set("abc")), log_func=andrey.quiet)
+    for s in STRINGS:
+        assert andrey.simulate_dfa(dfa, s) == bool(re.fullmatch(regex, s)), s
+
+
+def test_followpos_dfa_respects_budget(andrey):
+    postfix = andrey.regex_to_postfix("(a|b)*a" + "(a|b)" * 12, log_func=andrey.quiet)
+    assert andrey.regex_to_dfa(postfix, ["a", "b"], log_func=andrey.quiet, max_states=1000) is None
+    assert andrey.regex_to_dfa(postfix, ["a", "b"], log_func=andrey.quiet, max_states=10000) is not None
+
+
+@pytest.mark.parametrize("regex", REGEXES)
+def test_lazy_dfa_matches_re(andrey, regex):
+    postfix = andrey.regex_to_postfix(regex, log_func=andrey.quiet)
+    dfa = andrey.LazyDFA(andrey.FlatNFA(andrey.build_nfa(postfix, log_func=andrey.quiet)), max_states=4)
+    for s in STRINGS:
+        assert dfa.accepts(s) == bool(re.fullmatch(regex, s)), s
+
+
+def test_lazy_dfa_skips_foreign_symbols(andrey):
+    postfix = andrey.regex_to_postfix("(a|b)*", log_func=andrey.quiet)
+    for nfa in (andrey.build_nfa(postfix, log_func=andrey.quiet),
+                andrey.FlatNFA(andrey.build_nfa(postfix, log_func=andrey.quiet))):
+        dfa = andrey.LazyDFA(nfa)
+        assert dfa.alphabet == {"a", "b"}
+        for code in range(0x400, 0x4400):
+            assert not dfa.accepts("ab" + chr(code))
+        assert dfa.accepts("abba")
+        assert len(dfa.transitions) <= 2 * len(dfa.subsets)
+
+
+def leftmost_longest(regex, text):
+    pattern = re.compile(regex)
+    spans, pos = [], 0
+    while pos <= len(text):
+        for start in range(pos, len(text) + 1):
+            ends = [end for end in range(start, len(text) + 1) if pattern.fullmatch(text, start, end)]
+            if ends:
+                break
+        else:
+            return spans
+        spans.append((start, ends[-1]))
+        pos = ends[-1] if ends[-1] > start else ends[-1] + 1
+    return spans
+
+
+@pytest.mark.parametrize("regex", REGEXES[:20])
+@pytest.mark.parametrize("prefilter", [False, True])
+def test_searcher_matches_brute_force(andrey, regex, prefilter):
+    rnd = random.Random(regex)
+    searcher = andrey.RegexSearcher.from_regex(regex, prefilter=prefilter)
+    for _ in range(10):
+        text = "".join(rnd.choice("abcx ") for _ in range(rnd.randint(0, 40)))
+        expected = leftmost_longest(regex, text)
+        data = text.encode()
+        assert list(searcher.finditer(data)) == expected, text
+        assert list(searcher.finditer(memoryview(data))) == expected, text
+        chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+        assert list(searcher.finditer_chunks(chunks)) == expected, text
+
+
+def test_searcher_prefilter_on_memoryview(andrey):
+    searcher = andrey.RegexSearcher.from_regex("(a|b)*abb")
+    data = b"x" * 100 + b"babb" + b"y" * 100
+    whole = memoryview(data)
+    assert searcher._finder(whole) == data.find
+    part = whole[50:]
+    assert part.obj is data and searcher._finder(part)(b"abb", 0) == 51
+    for view in (whole, part, memoryview(bytearray(data))):
+        skipped = searcher._skip(view, searcher._finder(view), 0, {})
+        assert view[skipped:skipped + 4] == b"babb"
+    assert list(searcher.finditer(part)) == [(50, 54)]
+
+
+def test_searcher_scales(andrey):
+    data = (b"lorem ipsum " * 50000) + b"aabb" + (b" dolor" * 50000)
+    searcher = andrey.RegexSearcher.from_regex("(a|b)*abb")
+    assert list(searcher.finditer(memoryview(data))) == [(600000, 600004)]
+
+
+def thompson(andrey, regex):
+    return andrey.build_nfa(andrey.regex_to_postfix(regex, log_func=andrey.quiet), log_func=andrey.quiet)
+
+
+@pytest.mark.parametrize("regex", REGEXES)
+def test_subset_construction_matches_re(andrey, regex):
+    nfa = thompson(andrey, regex)
+    dfa = andrey.nfa_to_dfa(nfa, ["a", "b", "c"], log_func=andrey.quiet)
+    # С бюджетом в 2 состояния ДКА достраивается моделированием НКА
+    hybrid = andrey.nfa_to_dfa(nfa, ["a", "b", "c"], log_func=andrey.quiet, max_states=2, cache_size=3)
+    for s in STRINGS:
+        expected = bool(re.fullmatch(regex, s))
+        assert andrey.simulate_dfa(dfa, s) == expected, s
+        assert andrey.simulate_dfa(hybrid, s) == expected, s
+
+
+def test_budget_scales(andrey):
+    regex = "(a|b)*a" + "(a|b)" * 15
+    hybrid = andrey.nfa_to_dfa(thompson(andrey, regex), ["a", "b"], log_func=andrey.quiet,
+                               max_states=300, cache_size=500)
+    assert isinstance(hybrid, andrey.HybridMatcher) and hybrid.states_built == 300
+    rnd = random.Random(0)
+    for _ in range(300):
+        s = "".join(rnd.choice("ab") for _ in range(rnd.randint(0, 40)))
+        assert hybrid.accepts(s) == bool(re.fullmatch(regex, s)), s
+    assert len(hybrid.ids) <= 500
+
+
+@pytest.mark.parametrize("regex", REGEXES + ["((a*)*|(b|c*)*)*a", "(a*b*)*c"])
+def test_flat_nfa_matches_re(andrey, regex):
+    flat = andrey.FlatNFA(thompson(andrey, regex))
+    dfa = andrey.nfa_to_dfa(flat, ["a", "b", "c"], log_func=andrey.quiet)
+    for s in STRINGS:
+        expected = bool(re.fullmatch(regex, s))
+        assert flat.accepts(s) == expected, s
+        assert andrey.simulate_dfa(dfa, s) == expected, s
+
+
+def test_flat_nfa_shares_closures(andrey):
+    # Все цели (x1|...|xk)* имеют одно замыкание: память и время O(k), а не O(k^2)
+    k = 4000
+    words = ["".join("abcdefghij"[int(d)] for d in f"{i:04d}") for i in range(k)]
+    regex = "(" + "|".join(words) + ")*"
+    nfa = thompson(andrey, regex)
+    t0 = time.perf_counter()
+    flat = andrey.FlatNFA(nfa)
+    assert time.perf_counter() - t0 < 2.0
+    distinct = {id(c): c for moves in flat.by_char.values() for c in moves.values()}
+    assert sum(len(c) for c in distinct.values()) < 10 * k
+    rnd = random.Random(0)
+    text = "".join(rnd.choice(words) for _ in range(100))
+    assert flat.accepts(text) and not flat.accepts(text + "a")
+
+
+MAIN = pathlib.Path(__file__).resolve().parent.parent / "RGR" / "Andrey" / "main.py"
+
+
+def run_main(*args, stdin=b""):
+    result = subprocess.run([sys.executable, str(MAIN), *map(str, args)], input=stdin,
+                            capture_output=True, check=True)
+    return result.stdout.decode("utf-8")
+
+
+def test_search_cli_files_and_stdin(tmp_path):
+    rnd = random.Random(0)
+    texts = ["".join(rnd.choice("ab x") for _ in range(300)) for _ in range(2)] + [""]
+    paths = []
+    for i, text in enumerate(texts):
+        paths.append(tmp_path / f"in{i}.txt")
+        paths[-1].write_bytes(text.encode())
+    regex = "(a|b)*abb"
+    expected = ["".join(f"{path}\t{s}\t{e}\n" for s, e in leftmost_longest(regex, text))
+                for path, text in zip(paths, texts)]
+    assert run_main("--search", regex, *paths) == "".join(expected)
+    # Один файл - без имени; stdin читается кусками, вхождения на их границах не теряются
+    single = "".join(f"{s}\t{e}\n" for s, e in leftmost_longest(regex, texts[0]))
+    assert run_main("--search", regex, paths[0]) == single
+    assert run_main("--search", regex, "--chunk-size", "7", stdin=texts[0].encode()) == single
+
+
+def test_batch_cli_matches_re(tmp_path):
+    patterns = REGEXES[:9] + ["a(b"]
+    (tmp_path / "patterns.txt").write_text("\n".join(patterns) + "\n\n", encoding="utf-8")
+    strings = STRINGS[:60]
+    (tmp_path / "strings.txt").write_text("".join(s + "\n" for s in strings), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    assert run_main("--batch", tmp_path / "patterns.txt", tmp_path / "strings.txt", "--workers", 2,
+                    "--chunk", 2, "--output", out) == ""
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    # Порядок записей - порядок выражений, хотя части проверяются в разных процессах
+    assert [r["index"] for r in records[:-1]] == list(range(len(patterns)))
+    for regex, record in zip(patterns[:-1], records):
+        assert record["pattern"] == regex and record["states"] > 0
+        assert record["matched"] == [i for i, s in enumerate(strings) if re.fullmatch(regex, s)], regex
+    assert "error" in records[-2] and "matched" not in records[-2]
+    summary = records[-1]["summary"]
+    assert (summary["patterns"], summary["strings"], summary["errors"]) == (len(patterns), len(strings), 1)
+    # Без файла строк они читаются из stdin, результат - в stdout
+    stdout = run_main("--batch", tmp_path / "patterns.txt", "--chunk", 16,
+                      stdin="".join(s + "\n" for s in strings).encode())
+    from_stdin = [json.loads(line) for line in stdout.splitlines()]
+    assert [r.get("matched") for r in from_stdin[:-1]] == [r.get("matched") for r in records[:-1]]
+
+
+def test_multi_pattern_matches_re(andrey):
+    patterns = REGEXES[:12]
+    multi = andrey.MultiPatternDFA(patterns)
+    for s in STRINGS:
+        assert multi.match(s) == {i for i, p in enumerate(patterns) if re.fullmatch(p, s)}, s
+    lexer = andrey.MultiPatternDFA(["ab*", "b", "c(a|b)*c"])
+    assert lexer.tokenize("abbbcabcab") == [(0, "abbb"), (2, "cabc"), (0, "ab")]
+    with pytest.raises(ValueError):
+        lexer.tokenize("abcab")
+
+
+def test_multi_pattern_scales(andrey):
+    keywords = ["".join("abcdefgh"[int(d)] for d in f"{i:04o}") for i in range(1000)]
+    multi = andrey.MultiPatternDFA(keywords + ["(a|b|c|d|e|f|g|h)*"])
+    for i in range(0, 1000, 37):
+        assert multi.match(keywords[i]) == {i, 1000}
+    assert multi.match("abc") == {1000}
+    picks = list(range(0, 1000, 3))
+    lexer = andrey.MultiPatternDFA(keywords)
+    assert lexer.tokenize("".join(keywords[i] for i in picks)) == [(i, keywords[i]) for i in picks]
+
+
+def test_compiled_regex_and_cache(andrey):
+    cache = andrey.RegexCache(maxsize=8)
+    compiled = [andrey.compile(regex, cache=cache) for regex in REGEXES]
+    for regex, dfa in zip(REGEXES, compiled):
+        restored = pickle.loads(pickle.dumps(dfa))
+        for s in STRINGS:
+            expected = bool(re.fullmatch(regex, s))
+            assert dfa.accepts(s) == expected and restored.accepts(s) == expected, (regex, s)
+    assert cache.stats()["size"] == 8 and cache.evictions > 0
+    first = andrey.compile("(ab)*c", cache=cache)
+    hits = cache.hits
+    assert andrey.compile("((ab)*)c", cache=cache) is first and cache.hits == hits + 1
+
+
+def test_compiled_regex_is_immutable(andrey):
+    cache = andrey.RegexCache()
+    shared = andrey.compile("(a|b)*abb", cache=cache)
+    with pytest.raises(AttributeError):
+        shared.start = 1
+    with pytest.raises(AttributeError):
+        shared.rows[0].clear()
+    with pytest.raises(TypeError):
+        shared.rows[0]["a"] = 0
+    restored = pickle.loads(pickle.dumps(shared))
+    with pytest.raises(TypeError):
+        restored.rows[0]["b"] = 0
+    assert andrey.compile("(a|b)*abb", cache=cache).accepts("babb")
+
+
+def nfa_states(nfa):
+    seen, stack = {nfa.start}, [nfa.start]
+    while stack:
+        st = stack.pop()
+        for nxt in st.epsilon_transitions + [t for ts in st.transitions.values() for t in ts]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+
+def test_build_nfa_is_reentrant(andrey):
+    from concurrent.futures import ThreadPoolExecutor
+    postfixes = [andrey.regex_to_postfix(r, log_func=andrey.quiet) for r in REGEXES] * 5
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        nfas = list(pool.map(lambda p: andrey.build_nfa(p, log_func=andrey.quiet), postfixes))
+    for regex, nfa in zip(REGEXES * 5, nfas):
+        # Свой счётчик у каждого построения: номера 0..n-1 без пропусков
+        ids = sorted(st.id for st in nfa_states(nfa))
+        assert ids == list(range(len(ids)))
+        for s in STRINGS[:40]:
+            assert andrey.simulate_nfa(nfa, s) == bool(re.fullmatch(regex, s)), s
+    # Общий счётчик из нескольких потоков не выдаёт одинаковых номеров
+    shared = itertools.count()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        nfas = list(pool.map(lambda p: andrey.build_nfa(p, log_func=andrey.quiet, ids=shared), postfixes))
+    ids = [st.id for nfa in nfas for st in nfa_states(nfa)]
+    assert len(ids) == len(set(ids))
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_compile_many_matches_re(andrey, processes):
+    cache = andrey.RegexCache(maxsize=1000)
+    patterns = REGEXES + ["(" + REGEXES[0] + ")"] + REGEXES[:5]
+    compiled = andrey.compile_many(patterns, workers=4, processes=processes, cache=cache)
+    assert compiled[len(REGEXES)] is compiled[0]  # Лишние скобки - та же запись кэша
+    for regex, dfa in zip(patterns, compiled):
+        assert dfa is andrey.compile(regex, cache=cache)
+        for s in STRINGS:
+            assert dfa.accepts(s) == bool(re.fullmatch(regex, s)), (regex, s)
+    assert cache.misses == len({andrey._pattern_key(r) for r in patterns})
+
+
+def test_cache_shared_between_threads(andrey):
+    from concurrent.futures import ThreadPoolExecutor
+    cache = andrey.RegexCache(maxsize=64)
+    patterns = REGEXES[:10] * 20
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        compiled = list(pool.map(lambda r: andrey.compile(r, cache=cache), patterns))
+    # Гонка компиляций одного выражения оставляет в кэше один объект
+    for regex, dfa in zip(patterns, compiled):
+        assert dfa is andrey.compile(regex, cache=cache)
+
+
+@pytest.mark.parametrize("regex", REGEXES[:20])
+def test_counterexample_is_shortest_witness(andrey, regex):
+    other = REGEXES[(REGEXES.index(regex) + 1) % 20]
+    nfa = thompson(andrey, regex)
+    witness = andrey.find_counterexample(nfa, andrey.compile(other), alphabet=["a", "b", "c"])
+    differs = [s for s in STRINGS if bool(re.fullmatch(regex, s)) != bool(re.fullmatch(other, s))]
+    if witness is None:
+        assert not differs
+    else:
+        assert bool(re.fullmatch(regex, witness)) != bool(re.fullmatch(other, witness))
+        assert not differs or len(witness) == len(differs[0])
+    # Автомат эквивалентен любому ДКА, построенному по тому же выражению
+    for dfa in (andrey.compile(regex), andrey.DerivativeMatcher.from_regex(regex),
+                andrey.LazyDFA(andrey.FlatNFA(nfa), max_states=4),
+                andrey.nfa_to_dfa(nfa, ["a", "b", "c"], log_func=andrey.quiet, max_states=2)):
+        assert andrey.find_counterexample(nfa, dfa, alphabet=["a", "b", "c"]) is None, dfa
+
+
+def test_counterexample_known_witness(andrey):
+    nfa = thompson(andrey, "(a|b)*abb")
+    assert andrey.find_counterexample(nfa, andrey.compile("(a|b)*ab")) == "ab"
+    assert andrey.find_counterexample(nfa, andrey.compile("(a|b)*abb|c")) == "c"
+    assert andrey.find_counterexample(nfa, andrey.compile("(b|a)*abb")) is None
+
+
+@pytest.mark.parametrize("regex", REGEXES[:20])
+def test_counts_and_samples_match_brute_force(andrey, regex):
+    dfa = andrey.compile(regex)
+    expected = [sum(1 for s in STRINGS if len(s) == n and re.fullmatch(regex, s)) for n in range(6)]
+    assert dfa.count_by_length(5) == expected
+    assert [dfa.count(n) for n in range(6)] == expected
+    for n in range(6):
+        words = dfa.sample(n, k=20, rnd=random.Random(n))
+        assert len(words) == (20 if expected[n] else 0)
+        assert all(len(w) == n and re.fullmatch(regex, w) for w in words)
+
+
+def test_counts_scale(andrey):
+    # Строки над {a, b} без двух b подряд: числа Фибоначчи
+    no_bb = andrey.compile("(a|ba)*(a|b|ba)")
+    modulus = 10 ** 9 + 7
+    fib = [1, 2]
+    while len(fib) <= 5000:
+        fib.append(fib[-1] + fib[-2])
+    assert no_bb.count_by_length(5000)[1:] == fib[1:]
+    assert no_bb.count(5000) == fib[5000]
+    x, y = 1, 2
+    for _ in range(10 ** 6 - 1):
+        x, y = y, (x + y) % modulus
+    assert no_bb.count(10 ** 6, modulus) == y
+
+
+class FakeRoot:
+    def __init__(self):
+        self.callbacks = {}
+        self.delays = []
+
+    def after(self, ms, callback):
+        self.delays.append(ms)
+        key = f"after#{len(self.delays)}"
+        self.callbacks[key] = callback
+        return key
+
+    def after_cancel(self, key):
+        del self.callbacks[key]
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.popitem()[1]()
+
+
+class FakeText:
+    def __init__(self):
+        self.text = ""
+        self.state = "disabled"
+        self.inserts = 0
+
+    def config(self, state):
+        self.state = state
+
+    def insert(self, index, text):
+        assert self.state == "normal" and index == "end"
+        self.text += text
+        self.inserts += 1
+
+    def delete(self, first, last):
+        assert self.state == "normal"
+        self.text = ""
+
+    def see(self, index):
+        pass
+
+
+@pytest.fixture
+def sink(andrey, monkeypatch):
+    monkeypatch.setattr(andrey, "tk", type("tk", (), {"END": "end"}))
+    return andrey.LogSink(FakeRoot(), FakeText())
+
+
+def test_log_sink_batches_messages(andrey, sink):
+    lines = [f"строка {i}" for i in range(2 * sink.CHUNK + 5)]
+    for line in lines:
+        sink(line)
+    # Одна отложенная запись на все сообщения, виджет до неё не трогается
+    assert sink.root.delays == [sink.FLUSH_MS] and sink.widget.inserts == 0
+    sink.root.run()
+    assert sink.widget.text == "\n".join(lines) + "\n"
+    assert sink.widget.inserts == 3 and sink.root.delays == [sink.FLUSH_MS, 1, 1]
+    assert sink.widget.state == "disabled" and not sink.pending and sink.scheduled is None
+
+
+def test_log_sink_flush_and_clear(andrey, sink):
+    sink("a")
+    sink.write("b")
+    sink.flush()
+    assert sink.widget.text == "a\nb\n" and not sink.root.callbacks and sink.scheduled is None
+    sink.flush()
+    assert sink.widget.inserts == 1
+    sink("c")
+    sink.clear()
+    assert sink.widget.text == "" and not sink.pending and not sink.root.callbacks
+    sink("d")
+    sink.root.run()
+    assert sink.widget.text == "d\n"
+
+
+def test_log_sink_levels(andrey, sink):
+    postfix = andrey.regex_to_postfix("(a|b)*abb", log_func=andrey.quiet)
+    counts = {}
+    for level in (andrey.LOG_DETAIL, andrey.LOG_STEPS, 0):
+        sink.level = level
+        sink.clear()
+        andrey.build_nfa(postfix, log_func=sink)
+        sink.write("итог")
+        counts[level] = len(sink.pending)
+        assert andrey.log_level(sink) == level and sink.pending[-1] == "итог"
+    # Подробные сообщения на уровне этапов не формируются, при 0 - виден только write
+    assert counts[andrey.LOG_DETAIL] > counts[andrey.LOG_STEPS] > counts[0] == 1
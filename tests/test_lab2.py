@@ -0,0 +1,214 @@
+import itertools
+import random
+import time
+
+import pytest
+
+
+def shared_class_dfa(lab2):
+    # '1' и '2' ведут себя одинаково и попадают в один класс символов
+    return lab2.DFA({'a', 'b'}, {'0', '1', '2'}, {
+        ('a', '0'): 'a', ('a', '1'): 'b', ('a', '2'): 'b',
+        ('b', '0'): 'a', ('b', '1'): 'b', ('b', '2'): 'b',
+    }, 'a', {'a'})
+
+
+def random_dfa(lab2, rng, n, symbols="ab", density=0.7):
+    states = [f"q{i}" for i in range(n)]
+    transitions = {(s, a): rng.choice(states) for s in states for a in symbols if rng.random() < density}
+    finals = {s for s in states if rng.random() < 0.4}
+    return lab2.DFA(set(states), set(symbols), transitions, "q0", finals)
+
+
+def test_dead_state_only_reachable_by_missing_transitions(lab2, capsys):
+    # q1 без переходов эквивалентен q2, у которого переходы только в себя
+    dfa = lab2.DFA({'q0', 'q1', 'q2'}, {'a', 'b'}, {
+        ('q0', 'a'): 'q1', ('q0', 'b'): 'q2',
+        ('q2', 'a'): 'q2', ('q2', 'b'): 'q2',
+    }, 'q0', {'q0'})
+    assert len(dfa.minimize(explain=True).states) == len(dfa.minimize().states) == 2
+    assert "мёртвое состояние" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_hopcroft_matches_moore(lab2, capsys, seed):
+    rng = random.Random(seed)
+    dfa = random_dfa(lab2, rng, rng.randint(1, 8))
+    fast = dfa.minimize()
+    slow = dfa.minimize(explain=True)
+    capsys.readouterr()
+    assert len(fast.states) == len(slow.states)
+    for n in range(6):
+        for word in map("".join, itertools.product("ab", repeat=n)):
+            expected = lab2._python_accepts(dfa, word)
+            assert lab2._python_accepts(fast, word) == expected
+            assert lab2._python_accepts(slow, word) == expected
+
+
+def test_hopcroft_scales(lab2):
+    # Счётчик по модулю n, повторённый дважды: минимальный автомат имеет n состояний
+    n = 3000
+    transitions = {}
+    for i in range(2 * n):
+        transitions[(f"q{i}", "a")] = f"q{(i + 1) % (2 * n)}"
+        transitions[(f"q{i}", "b")] = f"q{i}"
+    finals = {f"q{i}" for i in range(0, 2 * n, n)}
+    dfa = lab2.DFA({f"q{i}" for i in range(2 * n)}, {"a", "b"}, transitions, "q0", finals)
+    assert len(dfa.minimize().states) == n
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_compiled_matches_python_loop(lab2, seed):
+    rng = random.Random(seed)
+    dfa = random_dfa(lab2, rng, rng.randint(1, 10), symbols="abc")
+    compiled = dfa.compile()
+    for word in ("".join(rng.choice("abcd") for _ in range(rng.randint(0, 12))) for _ in range(300)):
+        expected = lab2._python_accepts(dfa, word)
+        assert compiled.accepts(word) == expected, word
+        state = compiled.run(word)
+        assert (state is not None and state in dfa.final_states) == expected, word
+    with pytest.raises(AttributeError):
+        compiled.start = 0
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_accepts_many_codes_are_symbol_indices(lab2, monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(lab2, "np", None)
+    elif lab2.np is None:
+        pytest.skip("NumPy не установлен")
+    compiled = shared_class_dfa(lab2).compile()
+    words = ["20", "1", "02", "210", "", "0x"]
+    codes = [[compiled.symbols.index(c) if c in compiled.symbols else 99 for c in w.ljust(3, "0")]
+             for w in words]
+    result = compiled.accepts_many(codes=codes, lengths=[len(w) for w in words])
+    assert list(result) == [compiled.accepts(w) for w in words]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("seed", range(20))
+def test_accepts_many_matches_python_loop(lab2, monkeypatch, use_numpy, seed):
+    if not use_numpy:
+        monkeypatch.setattr(lab2, "np", None)
+    elif lab2.np is None:
+        pytest.skip("NumPy не установлен")
+    rng = random.Random(seed)
+    dfa = random_dfa(lab2, rng, rng.randint(1, 10), symbols="abc")
+    words = ["".join(rng.choice("abcd") for _ in range(rng.randint(0, 12))) for _ in range(500)]
+    expected = [lab2._python_accepts(dfa, w) for w in words]
+    assert list(dfa.accepts_many(words)) == expected
+    assert list(dfa.compile().accepts_many(words, chunk_size=7)) == expected
+    # Цепочки-списки символов идут по общему пути кодирования
+    tokens = [list(w) for w in words]
+    assert list(dfa.accepts_many(tokens)) == expected
+    assert list(dfa.accepts_many([])) == []
+
+
+def test_accepts_many_scales(lab2):
+    rng = random.Random(0)
+    dfa = random_dfa(lab2, rng, 30, symbols="01", density=1.0)
+    words = ["".join(rng.choice("01") for _ in range(rng.randint(0, 60))) for _ in range(100_000)]
+    result = dfa.accepts_many(words)
+    assert len(result) == len(words)
+    sample = rng.sample(range(len(words)), 2000)
+    assert [bool(result[i]) for i in sample] == [lab2._python_accepts(dfa, words[i]) for i in sample]
+
+
+def random_nfa(lab2, rng, n, symbols="ab"):
+    states = [f"q{i}" for i in range(n)]
+    transitions = {}
+    for s in states:
+        for a in symbols:
+            targets = {t for t in states if rng.random() < 0.3}
+            if targets:
+                transitions[(s, a)] = targets
+    finals = {s for s in states if rng.random() < 0.3}
+    return lab2.DFA(set(states), set(symbols), transitions, "q0", finals)
+
+
+def nfa_accepts(nfa, word):
+    current = {nfa.start_state}
+    for c in word:
+        current = set().union(*(nfa.transitions.get((q, c), set()) for q in current))
+    return bool(current & nfa.final_states)
+
+
+WORDS = ["".join(w) for n in range(7) for w in itertools.product("ab", repeat=n)]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_subset_construction_matches_nfa(lab2, capsys, seed):
+    rng = random.Random(seed)
+    nfa = random_nfa(lab2, rng, rng.randint(1, 7))
+    expected = [nfa_accepts(nfa, w) for w in WORDS]
+    for subset_names in (True, False):
+        dfa = nfa.nfa_to_dfa(subset_names=subset_names)
+        assert [lab2._python_accepts(dfa, w) for w in WORDS] == expected
+    assert [lab2._python_accepts(nfa.minimize(), w) for w in WORDS] == expected
+    capsys.readouterr()
+
+
+def test_bit_moves_without_byte_tables(lab2):
+    rng = random.Random(0)
+    nfa = random_nfa(lab2, rng, 40)
+    bits = lab2.BitNFA(nfa)
+    assert bits.tables is not None
+    masks = [rng.getrandbits(40) for _ in range(500)]
+    expected = [[bits.move(m, k) for k in range(len(bits.classes))] for m in masks]
+    bits.tables = None  # Путь больших НКА: OR масок по установленным битам
+    assert [[bits.move(m, k) for k in range(len(bits.classes))] for m in masks] == expected
+
+
+def nth_from_last(lab2, n):
+    """НКА «n-й символ с конца - 1»: минимальный ДКА имеет 2^n состояний."""
+    transitions = {("s0", "0"): {"s0"}, ("s0", "1"): {"s0", "s1"}}
+    for i in range(1, n):
+        transitions[(f"s{i}", "0")] = {f"s{i + 1}"}
+        transitions[(f"s{i}", "1")] = {f"s{i + 1}"}
+    return lab2.DFA({f"s{i}" for i in range(n + 1)}, {"0", "1"}, transitions, "s0", {f"s{n}"})
+
+
+def test_subset_construction_scales(lab2):
+    n = 10
+    nfa = nth_from_last(lab2, n)
+    assert len(nfa.minimize().states) == 2 ** n
+    rng = random.Random(0)
+    words = ["".join(rng.choice("01") for _ in range(rng.randint(0, 40))) for _ in range(2000)]
+    expected = [len(w) >= n and w[-n] == "1" for w in words]
+    assert list(nfa.compile().accepts_many(words)) == expected
+
+    # Большой НКА: без квадратичных байтовых таблиц построение быстрое
+    big = nth_from_last(lab2, 4000)
+    t0 = time.perf_counter()
+    bits = lab2.BitNFA(big)
+    assert bits.tables is None and time.perf_counter() - t0 < 2.0
+    word = "1" + "0" * 3999
+    assert big.nfa_to_dfa(subset_names=False, max_states=100).accepts(word)
+    assert not big.nfa_to_dfa(subset_names=False, max_states=100).accepts(word[1:])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_budget_falls_back_to_hybrid_matcher(lab2, seed):
+    rng = random.Random(seed)
+    nfa = random_nfa(lab2, rng, rng.randint(2, 7))
+    expected = [nfa_accepts(nfa, w) for w in WORDS]
+    full = nfa.nfa_to_dfa(subset_names=False)
+    hybrid = nfa.nfa_to_dfa(max_states=2, cache_size=3)
+    if len(full.states) <= 2:
+        assert isinstance(hybrid, lab2.DFA)  # ДКА уложился в бюджет
+    else:
+        assert isinstance(hybrid, lab2.HybridMatcher) and hybrid.states_built == 2
+        assert [hybrid.accepts(w) for w in WORDS] == expected
+        assert len(hybrid.cache) <= max(3, hybrid.states_built)
+
+
+def test_budget_scales(lab2):
+    # 2^16 состояний ДКА не строятся: хватает бюджета в 256 и кэша
+    n = 16
+    nfa = nth_from_last(lab2, n)
+    hybrid = nfa.nfa_to_dfa(max_states=256, cache_size=1024)
+    assert isinstance(hybrid, lab2.HybridMatcher)
+    rng = random.Random(1)
+    words = ["".join(rng.choice("01") for _ in range(rng.randint(0, 60))) for _ in range(3000)]
+    assert [hybrid.accepts(w) for w in words] == [len(w) >= n and w[-n] == "1" for w in words]
+    assert len(hybrid.cache) <= 1024